@@ -0,0 +1,277 @@
+"""
+Banc d'essai de la recherche : ingestion d'un corpus fixe puis rejeu de requêtes annotées.
+
+Le corpus passe par le vrai chemin d'ingestion du tableau de bord
+(`extract_local_file`, `chunk_text`, `add_chunks_to_qdrant`) vers un Qdrant
+local (en mémoire par défaut, ou un conteneur via --qdrant-url), jamais vers
+les collections de production ni le catalogue MongoDB.
+
+Fichier de requêtes (JSON) : une liste d'objets
+    {"query": "texte de la requête", "relevant": ["chemin/relatif/du/fichier.pdf", ...]}
+où `relevant` liste les fichiers sources (relatifs au dossier du corpus)
+attendus dans les résultats.
+
+Exemple :
+    python benchmark_retrieval.py --corpus bench/corpus --queries bench/queries.json \\
+        --chunk-size 128 --hnsw-m 32 --output results/bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de getrusage, les pics mémoire sont rapportés à None
+    resource = None
+
+BENCHMARK_COLLECTION = "benchmark_retrieval"
+DEFAULT_TOP_K = (1, 3, 5, 10)
+
+
+def percentiles(samples):
+    """Latences p50/p95/p99 en millisecondes."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)}
+
+
+def peak_rss_mb(who=None):
+    """Pic de mémoire résidente (Mo) depuis le démarrage, cumulé sur toute la durée du processus.
+
+    `who=resource.RUSAGE_CHILDREN` : pic du plus gros processus enfant terminé.
+    None si la plateforme ne fournit pas `resource` (Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    """Commit courant, pour comparer les résultats d'une version à l'autre."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def add_environment_arguments(parser):
+    """Arguments communs aux outils hors Streamlit : Qdrant cible et caches disque."""
+    parser.add_argument('--qdrant-url', default=':memory:',
+                        help="':memory:' (défaut) ou URL d'un Qdrant local, ex. http://localhost:6333")
+    parser.add_argument('--qdrant-api-key', default=None)
+    parser.add_argument('--warm-cache', action='store_true',
+                        help='Réutiliser les caches disque d\'extraction et d\'embeddings')
+
+
+def prepare_environment(args, collection_name, cache_prefix, hnsw_config=None):
+    """Préparer un run hors Streamlit : caches, tableau de bord, modèle et collection de test vide.
+
+    Sans --warm-cache, les caches d'extraction et d'embeddings pointent vers un
+    dossier temporaire vide : chaque étape fait le vrai travail. Avec
+    `collection_name=None`, aucun client Qdrant n'est créé.
+    Retourne (module du tableau de bord, client Qdrant ou None, modèle).
+    """
+    if not args.warm_cache:
+        os.environ["INGESTION_CACHE_DIR"] = tempfile.mkdtemp(prefix=cache_prefix)
+
+    # Import après la configuration des caches (lue au chargement du module)
+    import oryzon_dashboard as dashboard
+    from qdrant_client import QdrantClient
+    args.model = args.model or dashboard.EMBEDDING_MODEL
+
+    model = dashboard.get_embedding_model(args.model)
+    if model is None:
+        raise RuntimeError(f"Impossible de charger le modèle {args.model}")
+    if collection_name is None:
+        return dashboard, None, model
+
+    if args.qdrant_url == ":memory:":
+        client = QdrantClient(":memory:")
+    else:
+        client = QdrantClient(url=args.qdrant_url, api_key=args.qdrant_api_key)
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    dashboard.create_qdrant_collection(
+        client, collection_name, model.get_sentence_embedding_dimension(), hnsw_config
+    )
+    return dashboard, client, model
+
+
+def positive_int(value):
+    """Type argparse : entier strictement positif."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"doit être ≥ 1 (reçu {value})")
+    return number
+
+
+def load_queries(path):
+    """Charger et valider le jeu de requêtes annotées."""
+    with open(path, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    for index, item in enumerate(queries):
+        if not item.get("query") or not item.get("relevant"):
+            raise ValueError(f"Requête #{index} : champs 'query' et 'relevant' obligatoires")
+    return queries
+
+
+def ingest_corpus(dashboard, client, args):
+    """Ingérer le corpus dans la collection de test et mesurer le débit."""
+    file_paths = dashboard.list_ingestible_files(args.corpus)
+    if not file_paths:
+        raise ValueError(f"Aucun fichier pris en charge dans {args.corpus}")
+
+    stats = {"files": len(file_paths), "failed": [], "chunks": 0,
+             "extraction_s": 0.0, "chunking_s": 0.0, "indexing_s": 0.0}
+    for path in file_paths:
+        source_file = Path(os.path.relpath(path, args.corpus)).as_posix()
+
+        started = time.perf_counter()
+        content, pages, error = dashboard.extract_local_file(path)
+        stats["extraction_s"] += time.perf_counter() - started
+        if error or not content:
+            stats["failed"].append({"file": source_file, "error": error or "Aucun texte extrait"})
+            continue
+
+        started = time.perf_counter()
+        chunks = dashboard.chunk_text(content, args.chunk_size, args.overlap, args.chunking, pages, args.model)
+        stats["chunking_s"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        success, message = dashboard.add_chunks_to_qdrant(
+            chunks, Path(path).stem, source_file, BENCHMARK_COLLECTION,
+            batch_size=args.batch_size, client=client, model_name=args.model
+        )
+        stats["indexing_s"] += time.perf_counter() - started
+        if not success:
+            stats["failed"].append({"file": source_file, "error": message})
+            continue
+        stats["chunks"] += len(chunks)
+
+    total_s = stats["extraction_s"] + stats["chunking_s"] + stats["indexing_s"]
+    stats["chunks_per_s"] = round(stats["chunks"] / stats["indexing_s"], 1) if stats["indexing_s"] else None
+    stats["files_per_s"] = round(len(file_paths) / total_s, 2) if total_s else None
+    for key in ("extraction_s", "chunking_s", "indexing_s"):
+        stats[key] = round(stats[key], 3)
+    return stats
+
+
+def replay_queries(dashboard, client, queries, args):
+    """Rejouer les requêtes, mesurer les latences et le rappel@k au niveau du fichier source."""
+    max_k = max(args.top_k)
+    embed_times, search_times, total_times = [], [], []
+    hits_at_k = {k: [] for k in args.top_k}
+
+    # Une requête de chauffe : chargement du modèle et premiers accès à l'index
+    dashboard.search_qdrant(BENCHMARK_COLLECTION, queries[0]["query"], max_k, client=client, model_name=args.model)
+
+    for item in queries:
+        relevant = set(item["relevant"])
+        for _ in range(args.repeat):
+            points, timings, error = dashboard.search_qdrant(
+                BENCHMARK_COLLECTION, item["query"], max_k, client=client, model_name=args.model
+            )
+            if error:
+                raise RuntimeError(f"Recherche '{item['query']}' : {error}")
+            embed_times.append(timings["embedding"])
+            search_times.append(timings["recherche"])
+            total_times.append(timings["embedding"] + timings["recherche"])
+
+        retrieved = [point.payload.get("source_file") for point in points]
+        for k in args.top_k:
+            hits_at_k[k].append(len(relevant & set(retrieved[:k])) / len(relevant))
+
+    return {
+        "queries": len(queries),
+        "repeat": args.repeat,
+        "latency_ms": {
+            "embedding": percentiles(embed_times),
+            "search": percentiles(search_times),
+            "total": percentiles(total_times)
+        },
+        "recall": {f"@{k}": round(float(np.mean(values)), 4) for k, values in hits_at_k.items()}
+    }
+
+
+def run_benchmark(args):
+    """Exécuter le banc d'essai complet et retourner le rapport."""
+    queries = load_queries(args.queries)
+    hnsw_config = {
+        key: value for key, value in (("m", args.hnsw_m), ("ef_construct", args.ef_construct))
+        if value is not None
+    }
+    # Caches vides (sauf --warm-cache) : débits mesurés à froid
+    dashboard, client, model = prepare_environment(args, BENCHMARK_COLLECTION, "bench_cache_", hnsw_config)
+
+    ingestion = ingest_corpus(dashboard, client, args)
+    search = replay_queries(dashboard, client, queries, args)
+
+    points_count = client.count(BENCHMARK_COLLECTION, exact=True).count
+    dimension = model.get_sentence_embedding_dimension()
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "qdrant": args.qdrant_url,
+            "model": args.model,
+            "chunking": args.chunking,
+            "chunk_size": args.chunk_size,
+            "overlap": args.overlap,
+            "batch_size": args.batch_size,
+            "hnsw": hnsw_config or "défaut",
+            "top_k": list(args.top_k)
+        },
+        "ingestion": ingestion,
+        "search": search,
+        "memory": {
+            "points": points_count,
+            "vectors_float32_mb": round(points_count * dimension * 4 / (1024 * 1024), 2),
+            "peak_rss_mb": peak_rss_mb()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai ingestion + recherche sur un Qdrant local.")
+    parser.add_argument('--corpus', required=True, help='Dossier du corpus fixe (parcouru récursivement)')
+    parser.add_argument('--queries', required=True, help='Fichier JSON des requêtes annotées')
+    add_environment_arguments(parser)
+    parser.add_argument('--model', default=None, help='Modèle d\'embedding (défaut : celui du tableau de bord)')
+    parser.add_argument('--chunking', choices=('tokens', 'chars'), default='tokens')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Tokens (ou caractères avec --chunking chars)')
+    parser.add_argument('--overlap', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--hnsw-m', type=int, default=None)
+    parser.add_argument('--ef-construct', type=int, default=None)
+    parser.add_argument('--top-k', type=int, nargs='+', default=list(DEFAULT_TOP_K))
+    parser.add_argument('--repeat', type=positive_int, default=5, help='Répétitions de chaque requête pour les latences')
+    parser.add_argument('--output', default=None, help='Chemin du rapport JSON (sinon sortie standard)')
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"💾 Rapport enregistré dans '{args.output}'")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cache disque de l'ingestion, adossé à SQLite.
+
+Chaque cache est un fichier SQLite clé → valeur binaire, borné en taille :
+au-delà de `max_bytes`, les entrées les moins récemment utilisées sont
+supprimées (LRU).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Nombre maximum de clés par requête IN (...)
+_MAX_KEYS_PER_QUERY = 500
+
+
+def sha256_hex(data: bytes) -> str:
+    """Retourner l'empreinte SHA-256 hexadécimale de données binaires."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(file_or_path, block_size: int = 1024 * 1024) -> str:
+    """Calculer le SHA-256 d'un fichier (chemin ou objet fichier) sans le charger en entier."""
+    digest = hashlib.sha256()
+    if isinstance(file_or_path, (str, os.PathLike)):
+        with open(file_or_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    else:
+        file_or_path.seek(0)
+        for block in iter(lambda: file_or_path.read(block_size), b""):
+            digest.update(block)
+        file_or_path.seek(0)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Cache clé → bytes persistant, borné en taille avec éviction LRU."""
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str):
+        """Retourner la valeur associée à `key`, ou None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list) -> dict:
+        """Retourner {clé: valeur} pour les clés présentes dans le cache."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                batch = keys[start:start + _MAX_KEYS_PER_QUERY]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE entries SET last_access = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows]
+                    )
+            self._conn.commit()
+        return found
+
+    def put(self, key: str, value: bytes):
+        """Enregistrer une valeur."""
+        self.put_many({key: value})
+
+    def put_many(self, items: dict):
+        """Enregistrer plusieurs valeurs puis évincer les plus anciennes si nécessaire."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            keys = list(items)
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                batch = keys[start:start + _MAX_KEYS_PER_QUERY]
+                placeholders = ",".join("?" * len(batch))
+                replaced = self._conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchone()[0]
+                self._total_bytes -= replaced
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                [(key, value, len(value), now) for key, value in items.items()]
+            )
+            self._total_bytes += sum(len(value) for value in items.values())
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Supprimer les entrées LRU jusqu'à repasser sous `max_bytes`."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+
+    def stats(self) -> dict:
+        """Retourner le nombre d'entrées et la taille occupée."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": count, "bytes": self._total_bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,172 @@
+"""
+File d'attente persistante des tâches d'ingestion, adossée à SQLite.
+
+Le stockage est indépendant de Streamlit : le tableau de bord y enregistre les
+tâches, un pool de threads les exécute et met à jour leur progression ici, ce
+qui permet de les suivre depuis n'importe quelle session et de les relancer
+après un échec ou un redémarrage.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+# Statuts possibles d'une tâche
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_INTERRUPTED = "interrupted"
+
+RETRYABLE_STATUSES = (STATUS_FAILED, STATUS_INTERRUPTED)
+
+# Colonnes ajoutées après la première version du schéma : créées à l'ouverture
+# des bases existantes
+_MIGRATED_COLUMNS = {
+    "result": "TEXT",
+    "drive_done": "INTEGER DEFAULT 0",
+    "drive_total": "INTEGER DEFAULT 0",
+}
+
+_COLUMNS = (
+    "id", "kind", "status", "stage", "params", "total", "done", "rate",
+    "message", "error", "attempts", "drive_status", "drive_message",
+    "created_at", "started_at", "finished_at", *_MIGRATED_COLUMNS,
+)
+
+_JSON_COLUMNS = ("params", "result")
+
+
+class JobStore:
+    """Table SQLite des tâches d'ingestion, partagée entre threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "kind TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "stage TEXT, "
+            "params TEXT NOT NULL, "
+            "total INTEGER DEFAULT 0, "
+            "done INTEGER DEFAULT 0, "
+            "rate REAL DEFAULT 0, "
+            "message TEXT, "
+            "error TEXT, "
+            "attempts INTEGER DEFAULT 0, "
+            "drive_status TEXT, "
+            "drive_message TEXT, "
+            "created_at REAL NOT NULL, "
+            "started_at REAL, "
+            "finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """Ajouter les colonnes manquantes aux bases créées par une version antérieure."""
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for name, definition in _MIGRATED_COLUMNS.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+
+    def create(self, kind: str, params: dict) -> int:
+        """Enregistrer une nouvelle tâche en attente et retourner son ID."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, status, params, created_at) VALUES (?, ?, ?, ?)",
+                (kind, STATUS_QUEUED, json.dumps(params, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _encode(self, fields: dict) -> dict:
+        """Valider les champs à écrire et sérialiser les colonnes JSON."""
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(sorted(unknown))}")
+        for name in _JSON_COLUMNS:
+            if name in fields and fields[name] is not None:
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        return fields
+
+    def update(self, job_id: int, **fields):
+        """Mettre à jour les champs d'une tâche."""
+        fields = self._encode(fields)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+    def update_if(self, job_id: int, field: str, expected, **fields) -> bool:
+        """Mettre à jour une tâche seulement si `field` vaut encore l'une des valeurs `expected`.
+
+        Comparaison et écriture en une seule requête (compare-and-set) : deux
+        relances simultanées ne peuvent pas réclamer la même tâche. `None` dans
+        `expected` correspond à un champ vide. Retourne True si la tâche a été modifiée.
+        """
+        if field not in _COLUMNS:
+            raise ValueError(f"Champ inconnu : {field}")
+        fields = self._encode(fields)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        values = [value for value in expected if value is not None]
+        conditions = []
+        if values:
+            conditions.append(f"{field} IN ({', '.join('?' for _ in values)})")
+        if None in expected:
+            conditions.append(f"{field} IS NULL")
+        if not conditions:
+            return False
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND ({' OR '.join(conditions)})",
+                (*fields.values(), job_id, *values)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def get(self, job_id: int):
+        """Retourner une tâche sous forme de dict, ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 100) -> list:
+        """Retourner les tâches les plus récentes en premier."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def mark_interrupted(self) -> int:
+        """Marquer comme interrompues les tâches (et envois Drive) laissés en cours par un processus arrêté."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ? WHERE status IN (?, ?)",
+                (STATUS_INTERRUPTED, "Processus arrêté pendant l'exécution", STATUS_QUEUED, STATUS_RUNNING)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET drive_status = ?, drive_message = ? WHERE drive_status IN (?, ?)",
+                (STATUS_INTERRUPTED, "Processus arrêté pendant l'envoi", STATUS_QUEUED, STATUS_RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        for name in _JSON_COLUMNS:
+            if job[name] is not None:
+                job[name] = json.loads(job[name])
+        return job
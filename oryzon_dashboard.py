@@ -10,20 +10,49 @@ Tableau de bord unifié pour la gestion de :
 
 import os 
 import streamlit as st
-import warnings
 from pathlib import Path
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import PyMongoError, BulkWriteError
 from bson.objectid import ObjectId
 import bcrypt
 from datetime import datetime
 import re
+import time
+import hashlib
+import uuid
+import math
+import shutil
+import tempfile
+import multiprocessing
+import zipfile
+import csv
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from bisect import bisect_right
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct
+from qdrant_client.models import (
+    PointStruct, Filter, FieldCondition, MatchValue,
+    FilterSelector, PointIdsList, PayloadSchemaType,
+    VectorParams, Distance, HnswConfigDiff, VectorParamsDiff, CollectionParamsDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    ProductQuantization, ProductQuantizationConfig, CompressionRatio,
+    BinaryQuantization, BinaryQuantizationConfig, Disabled
+)
 import pandas as pd
+import numpy as np
 import json
+import io
 import push_to_google_drive
+import workers
+from ingestion_cache import DiskCache, file_sha256, sha256_hex
+from ingestion_jobs import (
+    JobStore, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED,
+    STATUS_INTERRUPTED, RETRYABLE_STATUSES
+)
 
 
 try:
@@ -42,11 +71,53 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB", "admin_db")
 MONGO_COLLECTION = os.getenv("COLLECTION_NAME", "users")
+MONGO_CATALOG_COLLECTION = os.getenv("CATALOG_COLLECTION_NAME", "document_catalog")
+MONGO_DRIVE_MAPPING_COLLECTION = os.getenv("DRIVE_MAPPING_COLLECTION_NAME", "drive_file_mapping")
+# Transition : le chatbot lit encore l'ancien document `config` (tout le mapping dans un champ).
+# Chaque entrée modifiée y est aussi reportée ; à désactiver (0) puis supprimer une fois
+# le chatbot passé à la collection MONGO_DRIVE_MAPPING_COLLECTION.
+DRIVE_MAPPING_LEGACY_SYNC = os.getenv("DRIVE_MAPPING_LEGACY_SYNC", "1") == "1"
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+USERS_CACHE_TTL = int(os.getenv("USERS_CACHE_TTL", "30"))  # secondes
+USERS_SELECT_LIMIT = 200  # utilisateurs proposés dans les listes de sélection
 
 # Configuration Qdrant
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+SEARCH_MAX_TOP_K = 50
+SEARCH_FILTERS_CACHE_TTL = int(os.getenv("SEARCH_FILTERS_CACHE_TTL", "60"))  # secondes
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))  # plafonné à la limite du modèle
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+TOKENIZE_BATCH_SIZE = 256  # phrases tokenisées par appel au tokenizer
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+UPSERT_RETRY_DELAY = 1.0  # secondes, doublé à chaque nouvelle tentative
+
+# Espace de noms des IDs de points déterministes (UUIDv5) — ne pas modifier,
+# sinon les réingestions ne remplaceront plus les points existants
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "oryzon-partners/master-rag-agent/points")
+
+# Champs de payload indexés (keyword) pour le filtrage et la suppression côté serveur
+PAYLOAD_INDEX_FIELDS = ("source_file", "doc_title")
+REMOVAL_FIELDS = {"source": "source_file", "title": "doc_title"}
+
+# Configuration de stockage des collections (panneau « Collection »)
+QUANTIZATION_LABELS = {
+    "none": "Aucune (float32)",
+    "scalar": "Scalaire int8 (÷4)",
+    "product": "Produit (PQ)",
+    "binary": "Binaire (÷32)",
+}
+PQ_COMPRESSION_RATIOS = ("x4", "x8", "x16", "x32", "x64")
+HNSW_DEFAULT_M = 16
+HNSW_DEFAULT_EF_CONSTRUCT = 100
+HNSW_M_RANGE = (0, 128)  # m = 0 : pas de graphe (collections filtrées par payload uniquement)
+HNSW_EF_CONSTRUCT_RANGE = (4, 4096)
 
 # Collections disponibles pour l'upload
 QDRANT_COLLECTIONS = {
@@ -54,11 +125,40 @@ QDRANT_COLLECTIONS = {
     "wiki_agency_docs":   "📖 Wiki Agency Docs",
 }
 
+# Formats de documents pris en charge pour l'ingestion
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".json")
+
+# Extraction PDF parallèle
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = 20  # en dessous, l'extraction reste dans le processus courant
+PDF_EXTRACTION_WINDOW = 2 * PDF_EXTRACTION_WORKERS  # PDF en cours d'extraction lors d'un import en masse
+
+# Cache disque de l'ingestion (texte extrait et embeddings)
+INGESTION_CACHE_DIR = os.getenv("INGESTION_CACHE_DIR", ".ingestion_cache")
+EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "512"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+SESSION_MEMO_MAX_ENTRIES = 4  # extractions / découpages conservés par session Streamlit
+
+# File d'attente des tâches d'ingestion
+INGESTION_JOBS_DB = os.getenv("INGESTION_JOBS_DB", "ingestion_jobs.sqlite")
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+DRIVE_UPLOAD_WORKERS = int(os.getenv("DRIVE_UPLOAD_WORKERS", "2"))
+RAG_DATA_DIR = push_to_google_drive.RAG_DATA_FOLDER
+JOB_STATUS_LABELS = {
+    STATUS_QUEUED: "⏳ En attente",
+    STATUS_RUNNING: "⚙️ En cours",
+    STATUS_DONE: "✅ Terminée",
+    STATUS_FAILED: "❌ Échouée",
+    STATUS_INTERRUPTED: "⚠️ Interrompue",
+}
+
 # Constantes de validation
 MIN_USERNAME_LENGTH = 3
 MAX_USERNAME_LENGTH = 30
 MIN_PASSWORD_LENGTH = 8
 MAX_PASSWORD_LENGTH = 128
+BCRYPT_ROUNDS = 12
+USER_IMPORT_MAX_ROWS = 5000
 
 # Branding Oryzon Partners
 COMPANY_NAME = "Oryzon Partners"
@@ -309,26 +409,80 @@ st.markdown(f"""
 # CONNEXION À LA BASE DE DONNÉES
 # =============================================================================
 
-def get_mongo_collection():
-    """Initialiser la connexion MongoDB pour la gestion des utilisateurs."""
+def run_mongo_migrations(db):
+    """Créer les index et migrer les anciens formats (une seule fois par processus)."""
+    # S'assurer que le nom d'utilisateur est indexé
+    db[MONGO_COLLECTION].create_index("username", unique=True)
+    
+    # Catalogue : une entrée par (collection Qdrant, titre, fichier source)
+    db[MONGO_CATALOG_COLLECTION].create_index(
+        [("collection", 1), ("doc_title", 1), ("source_file", 1)],
+        unique=True
+    )
+    
+    # Mapping Drive : recherche en O(1) par chemin relatif dans RAG DATA
+    mapping_collection = db[MONGO_DRIVE_MAPPING_COLLECTION]
+    mapping_collection.create_index("rel_path", unique=True)
+    
+    # Ancien format du mapping : tout le dictionnaire dans un seul document `config`
+    if mapping_collection.estimated_document_count() == 0:
+        legacy = db["config"].find_one({"config_name": "drive_file_mapping"}, {"mapping": 1})
+        if legacy and legacy.get("mapping"):
+            upsert_mapping_entries(mapping_collection, legacy["mapping"])
+
+@st.cache_resource
+def get_mongo_client():
+    """Client MongoDB unique du processus, avec pool de connexions, partagé entre les reruns.
+
+    Lève PyMongoError si le serveur est injoignable : l'échec n'est pas mis en cache
+    et la connexion est retentée au rerun suivant.
+    """
+    client = MongoClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS
+    )
     try:
-        if not MONGO_URI:
-            return None, "MONGO_URI non trouvé dans les variables d'environnement"
-        
-        client = MongoClient(MONGO_URI)
-        db = client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
-        
         # Vérifier la connexion
         client.admin.command('ping')
-        
-        # S'assurer que le nom d'utilisateur est indexé
-        collection.create_index("username", unique=True)
-        
-        return collection, None
+        run_mongo_migrations(client[MONGO_DB])
+    except PyMongoError:
+        client.close()
+        raise
+    return client
+
+def get_mongo_db():
+    """Retourner la base MongoDB de l'application via le client partagé."""
+    try:
+        if not MONGO_URI:
+            return None, "MONGO_URI non trouvé dans les variables d'environnement"
+        return get_mongo_client()[MONGO_DB], None
     except PyMongoError as e:
         return None, str(e)
 
+def get_mongo_collection():
+    """Initialiser la connexion MongoDB pour la gestion des utilisateurs."""
+    db, error = get_mongo_db()
+    if error:
+        return None, error
+    return db[MONGO_COLLECTION], None
+
+def get_catalog_collection():
+    """Initialiser la collection MongoDB du catalogue de documents Qdrant."""
+    db, error = get_mongo_db()
+    if error:
+        return None, error
+    return db[MONGO_CATALOG_COLLECTION], None
+
+def get_drive_mapping_collection():
+    """Initialiser la collection MongoDB du mapping Google Drive (un document par fichier)."""
+    db, error = get_mongo_db()
+    if error:
+        return None, error
+    return db[MONGO_DRIVE_MAPPING_COLLECTION], None
+
 # =============================================================================
 # CONNEXION À QDRANT
 # =============================================================================
@@ -348,11 +502,11 @@ def get_qdrant_client():
         return None, str(e)
 
 @st.cache_resource
-def get_embedding_model():
+def get_embedding_model(model_name: str = EMBEDDING_MODEL):
     """Charger le modèle d'embedding (chargement paresseux)."""
     try:
         from sentence_transformers import SentenceTransformer
-        return SentenceTransformer(EMBEDDING_MODEL)
+        return SentenceTransformer(model_name)
     except ImportError as e:
         st.error(f"❌ Erreur d'importation : {e}")
         st.info("Essayez d'exécuter : pip install --upgrade sentence-transformers huggingface-hub")
@@ -361,6 +515,164 @@ def get_embedding_model():
         st.error(f"Erreur lors du chargement du modèle d'embedding : {e}")
         return None
 
+def create_payload_indexes(client, collection_name: str):
+    """Créer les index keyword sur `source_file` et `doc_title`."""
+    # Idempotent côté Qdrant : un index existant avec le même schéma est conservé
+    for field_name in PAYLOAD_INDEX_FIELDS:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD
+        )
+
+@st.cache_resource
+def ensure_payload_indexes(collection_name: str):
+    """Créer une fois par processus les index de payload de la collection."""
+    client, error = get_qdrant_client()
+    if error:
+        raise RuntimeError(error)
+    create_payload_indexes(client, collection_name)
+    return True
+
+def build_quantization_config(kind: str, compression: str = "x16", always_ram: bool = True):
+    """Construire la configuration de quantification Qdrant (None si aucune)."""
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if kind == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio(compression), always_ram=always_ram)
+        )
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    return None
+
+def create_qdrant_collection(client, collection_name: str, vector_size: int, hnsw_config: dict = None,
+                             quantization_config=None, on_disk_vectors: bool = False,
+                             on_disk_payload: bool = False):
+    """Créer une collection (distance cosinus) avec ses index de payload."""
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=on_disk_vectors),
+        hnsw_config=HnswConfigDiff(**hnsw_config) if hnsw_config else None,
+        quantization_config=quantization_config,
+        on_disk_payload=on_disk_payload
+    )
+    create_payload_indexes(client, collection_name)
+
+def named_vector_params(info) -> dict:
+    """Paramètres des vecteurs d'une collection par nom ("" pour le vecteur par défaut)."""
+    vectors = info.config.params.vectors
+    return vectors if isinstance(vectors, dict) else {"": vectors}
+
+def update_qdrant_collection(client, collection_name: str, hnsw_config: dict, quantization_config=None,
+                             on_disk_vectors: bool = False, on_disk_payload: bool = False):
+    """Modifier le stockage d'une collection existante ; Qdrant réoptimise les segments en arrière-plan."""
+    info = client.get_collection(collection_name)
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={name: VectorParamsDiff(on_disk=on_disk_vectors) for name in named_vector_params(info)},
+        hnsw_config=HnswConfigDiff(**hnsw_config),
+        quantization_config=quantization_config or Disabled.DISABLED,
+        collection_params=CollectionParamsDiff(on_disk_payload=on_disk_payload)
+    )
+
+def estimate_collection_memory(info) -> list:
+    """Estimer l'empreinte de stockage d'une collection à partir de `get_collection`.
+
+    Retourne une ligne par composant : vecteurs float32, vecteurs quantifiés,
+    graphe HNSW et payload, avec leur emplacement (RAM ou disque).
+    """
+    points = info.points_count or 0
+    hnsw = info.config.hnsw_config
+    rows = []
+    for name, params in named_vector_params(info).items():
+        label = f" « {name} »" if name else ""
+        rows.append({
+            "Composant": f"Vecteurs float32{label}",
+            "Emplacement": "Disque (mmap)" if params.on_disk else "RAM",
+            "Taille estimée (Mo)": points * params.size * 4 / (1024 * 1024)
+        })
+        
+        quantization = params.quantization_config or info.config.quantization_config
+        if isinstance(quantization, ScalarQuantization):
+            quantized_bytes, always_ram = points * params.size, quantization.scalar.always_ram
+        elif isinstance(quantization, ProductQuantization):
+            ratio = int(CompressionRatio(quantization.product.compression).value.lstrip("x"))
+            quantized_bytes, always_ram = points * params.size * 4 / ratio, quantization.product.always_ram
+        elif isinstance(quantization, BinaryQuantization):
+            quantized_bytes, always_ram = points * params.size / 8, quantization.binary.always_ram
+        else:
+            quantized_bytes = None
+        if quantized_bytes is not None:
+            rows.append({
+                "Composant": f"Vecteurs quantifiés{label}",
+                "Emplacement": "RAM" if always_ram else "Disque (mmap)",
+                "Taille estimée (Mo)": quantized_bytes / (1024 * 1024)
+            })
+        
+        # Niveau 0 du graphe : jusqu'à 2·m voisins de 4 octets par point
+        rows.append({
+            "Composant": f"Graphe HNSW{label} (m={hnsw.m})",
+            "Emplacement": "Disque (mmap)" if hnsw.on_disk else "RAM",
+            "Taille estimée (Mo)": points * hnsw.m * 2 * 4 / (1024 * 1024)
+        })
+    
+    rows.append({
+        "Composant": "Payload (texte des chunks)",
+        "Emplacement": "Disque" if info.config.params.on_disk_payload else "RAM",
+        "Taille estimée (Mo)": None
+    })
+    return rows
+
+@st.cache_resource
+def get_process_pool():
+    """Pool de processus partagé pour les tâches CPU (extraction PDF)."""
+    # "spawn" : les enfants ne héritent pas des threads du serveur Streamlit
+    return ProcessPoolExecutor(
+        max_workers=PDF_EXTRACTION_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+def reset_process_pool(pool):
+    """Écarter un pool cassé (worker tué, ex. par manque de mémoire) ; le suivant est recréé à la demande."""
+    if get_process_pool() is pool:
+        get_process_pool.clear()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def run_in_process_pool(task):
+    """Exécuter `task(pool)`, en recréant le pool et en réessayant une fois s'il est cassé."""
+    pool = get_process_pool()
+    try:
+        return task(pool)
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+    
+    pool = get_process_pool()
+    try:
+        return task(pool)
+    except BrokenProcessPool:
+        # Même tâche fatale au worker : le pool est remplacé pour les suivantes
+        reset_process_pool(pool)
+        raise
+
+@st.cache_resource
+def get_extraction_cache():
+    """Cache disque du texte extrait, indexé par SHA-256 du fichier."""
+    return DiskCache(
+        os.path.join(INGESTION_CACHE_DIR, "extraction.sqlite"),
+        EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+    )
+
+@st.cache_resource
+def get_embedding_cache():
+    """Cache disque des vecteurs, indexé par (modèle, hash du texte du chunk)."""
+    return DiskCache(
+        os.path.join(INGESTION_CACHE_DIR, "embeddings.sqlite"),
+        EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+    )
+
 def get_qdrant_stats(collection_name: str):
     """Obtenir les statistiques de la collection Qdrant."""
     try:
@@ -373,8 +685,8 @@ def get_qdrant_stats(collection_name: str):
     except Exception as e:
         return None, str(e)
 
-def list_qdrant_documents(collection_name: str):
-    """Lister tous les documents uniques dans la collection Qdrant."""
+def scan_qdrant_documents(collection_name: str):
+    """Parcourir toute la collection Qdrant pour compter les chunks par document."""
     try:
         client, error = get_qdrant_client()
         if error:
@@ -407,83 +719,352 @@ def list_qdrant_documents(collection_name: str):
     except Exception as e:
         return None, str(e)
 
-def add_chunks_to_qdrant(chunks: list, doc_title: str, source_file: str, collection_name: str):
-    """Ajouter des chunks à Qdrant avec embeddings."""
+def rebuild_document_catalog(collection_name: str):
+    """Reconstruire le catalogue d'une collection à partir d'un parcours complet de Qdrant."""
+    documents, error = scan_qdrant_documents(collection_name)
+    if error:
+        return None, error
+    
+    catalog, error = get_catalog_collection()
+    if error:
+        return documents, None
+    
+    try:
+        now = datetime.utcnow()
+        catalog.delete_many({"collection": collection_name})
+        if documents:
+            catalog.insert_many([
+                {
+                    "collection": collection_name,
+                    "doc_title": title,
+                    "source_file": source,
+                    "chunks": count,
+                    "updated_at": now
+                }
+                for (title, source), count in documents.items()
+            ])
+        return documents, None
+    except PyMongoError as e:
+        return None, str(e)
+
+def update_catalog_entry(collection_name: str, doc_title: str, source_file: str):
+    """Recompter les chunks d'un document et mettre à jour son entrée du catalogue."""
     try:
+        catalog, error = get_catalog_collection()
+        if error:
+            return
+        
         client, error = get_qdrant_client()
         if error:
-            return False, error
+            return
         
-        model = get_embedding_model()
+        count = client.count(
+            collection_name=collection_name,
+            count_filter=Filter(must=[
+                FieldCondition(key="doc_title", match=MatchValue(value=doc_title)),
+                FieldCondition(key="source_file", match=MatchValue(value=source_file))
+            ]),
+            exact=True
+        ).count
+        
+        key = {"collection": collection_name, "doc_title": doc_title, "source_file": source_file}
+        if count:
+            catalog.update_one(
+                key,
+                {"$set": {"chunks": count, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        else:
+            catalog.delete_one(key)
+    except Exception:
+        # Le catalogue est réparable via « Reconstruire le Catalogue »
+        pass
+
+def remove_catalog_entries(collection_name: str, field: str, value: str):
+    """Retirer du catalogue les documents dont `field` vaut `value`."""
+    try:
+        catalog, error = get_catalog_collection()
+        if error:
+            return
+        catalog.delete_many({"collection": collection_name, field: value})
+    except PyMongoError:
+        pass
+
+def list_qdrant_documents(collection_name: str):
+    """Lister les documents de la collection depuis le catalogue (sans parcourir Qdrant)."""
+    catalog, error = get_catalog_collection()
+    if error:
+        # Pas de MongoDB : on retombe sur le parcours complet de la collection
+        return scan_qdrant_documents(collection_name)
+    
+    try:
+        entries = list(catalog.find(
+            {"collection": collection_name},
+            {"_id": 0, "doc_title": 1, "source_file": 1, "chunks": 1}
+        ))
+    except PyMongoError as e:
+        return None, str(e)
+    
+    if not entries:
+        # Catalogue encore vide pour cette collection : initialisation
+        return rebuild_document_catalog(collection_name)
+    
+    documents = {
+        (entry.get("doc_title", "Unknown"), entry.get("source_file", "Unknown")): entry.get("chunks", 0)
+        for entry in entries
+    }
+    return documents, None
+
+@st.cache_data(ttl=SEARCH_FILTERS_CACHE_TTL, show_spinner=False)
+def get_search_filter_choices(collection_name: str) -> tuple[list, list]:
+    """Fichiers sources et titres proposés comme filtres de recherche (mis en cache par collection).
+
+    Lève RuntimeError en cas d'échec, qui n'est donc pas mis en cache.
+    """
+    documents, error = list_qdrant_documents(collection_name)
+    if error:
+        raise RuntimeError(error)
+    documents = documents or {}
+    return sorted({source for _, source in documents}), sorted({title for title, _ in documents})
+
+def iter_batches(iterable, batch_size: int):
+    """Découper un itérable en listes de taille bornée, sans le matérialiser."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Clé du cache d'embeddings pour un texte encodé par un modèle donné."""
+    return sha256_hex(f"{model_name}\0{text}".encode("utf-8"))
+
+def encode_with_cache(model, texts: list, batch_size: int = EMBEDDING_BATCH_SIZE, model_name: str = EMBEDDING_MODEL):
+    """Encoder une liste de textes en matrice NumPy, en ne calculant que les vecteurs absents du cache."""
+    cache = get_embedding_cache()
+    keys = [embedding_cache_key(model_name, text) for text in texts]
+    cached = cache.get_many(list(set(keys)))
+    
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        # Un seul passage du modèle pour tous les textes manquants du lot
+        computed = model.encode(
+            [texts[i] for i in missing],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+        new_entries = {}
+        for i, vector in zip(missing, computed):
+            new_entries[keys[i]] = vector.tobytes()
+        cached.update(new_entries)
+        cache.put_many(new_entries)
+    
+    return np.vstack([np.frombuffer(cached[key], dtype=np.float32) for key in keys])
+
+def iter_embedded_batches(model, chunks, batch_size: int = EMBEDDING_BATCH_SIZE, start_index: int = 0,
+                          model_name: str = EMBEDDING_MODEL):
+    """Encoder un flux de chunks par lots et produire (index_début, lot, matrice d'embeddings)."""
+    batch_start = start_index
+    for batch in iter_batches(chunks, batch_size):
+        embeddings = encode_with_cache(model, [chunk["content"] for chunk in batch], batch_size, model_name)
+        yield batch_start, batch, embeddings
+        batch_start += len(batch)
+
+def upsert_with_retry(client, collection_name: str, points: list, max_retries: int = UPSERT_MAX_RETRIES):
+    """Envoyer un lot de points à Qdrant en réessayant ce lot seul en cas d'échec."""
+    delay = UPSERT_RETRY_DELAY
+    for attempt in range(1, max_retries + 1):
+        try:
+            client.upsert(collection_name=collection_name, points=points, wait=True)
+            return
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+def make_point_id(collection_name: str, source_file: str, chunk_id: int, content: str) -> str:
+    """Calculer l'ID déterministe d'un point à partir de sa source et de son contenu.
+
+    Le même chunk réingéré produit le même ID (upsert idempotent) et deux
+    documents distincts ne peuvent pas s'écraser, même en ingestion parallèle.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{collection_name}|{source_file}|{chunk_id}|{content_hash}"))
+
+def build_point(collection_name: str, doc_title: str, source_file: str, chunk_id: int,
+                chunk: dict, embedding) -> PointStruct:
+    """Construire le point Qdrant d'un chunk (pages et positions réelles dans le document)."""
+    content = chunk["content"]
+    return PointStruct(
+        id=make_point_id(collection_name, source_file, chunk_id, content),
+        vector=embedding.tolist(),
+        payload={
+            "type": "text",
+            "doc_title": doc_title,
+            "source_file": source_file,
+            "page": chunk["page"],
+            "page_end": chunk["page_end"],
+            "char_start": chunk["char_start"],
+            "char_end": chunk["char_end"],
+            "chunk_id": chunk_id,
+            "has_images": False,
+            "image_count": 0,
+            "content": content
+        }
+    )
+
+def add_chunks_to_qdrant(chunks, doc_title: str, source_file: str, collection_name: str,
+                         batch_size: int = EMBEDDING_BATCH_SIZE, progress_callback=None, total: int = None,
+                         start_index: int = 0, client=None, model_name: str = EMBEDDING_MODEL):
+    """Ajouter des chunks à Qdrant avec embeddings, lot par lot.
+
+    `chunks` (produits par `iter_chunks`) peut être une liste ou un générateur : chaque lot est encodé puis
+    envoyé avant de lire le suivant, la mémoire reste donc bornée par `batch_size`.
+    `start_index` est l'indice du premier chunk fourni, pour reprendre une
+    ingestion interrompue. `progress_callback(done, total, elapsed)` est appelé
+    après chaque lot envoyé.
+    
+    Un `client` Qdrant fourni (benchmarks) est utilisé tel quel : ses index de
+    payload sont à la charge de l'appelant et le catalogue MongoDB n'est pas modifié.
+    """
+    try:
+        catalog_client = client is None
+        if catalog_client:
+            client, error = get_qdrant_client()
+            if error:
+                return False, error
+            ensure_payload_indexes(collection_name)
+        
+        model = get_embedding_model(model_name)
         if model is None:
             return False, "Erreur lors du chargement du modèle d'embedding"
         
-        # Obtenir le prochain ID
-        info = client.get_collection(collection_name)
-        start_id = info.points_count
-        
-        points = []
-        for i, chunk_content in enumerate(chunks):
-            embedding = model.encode(chunk_content)
-            points.append(
-                PointStruct(
-                    id=start_id + i,
-                    vector=embedding.tolist(),
-                    payload={
-                        "type": "text",
-                        "doc_title": doc_title,
-                        "source_file": source_file,
-                        "page": i + 1,
-                        "chunk_id": i,
-                        "has_images": False,
-                        "image_count": 0,
-                        "content": chunk_content
-                    }
+        if total is None and hasattr(chunks, "__len__"):
+            total = start_index + len(chunks)
+        
+        done = start_index
+        started = time.perf_counter()
+        for batch_start, batch, embeddings in iter_embedded_batches(model, chunks, batch_size, start_index, model_name):
+            points = [
+                build_point(collection_name, doc_title, source_file, i, chunk, embedding)
+                for i, chunk, embedding in zip(range(batch_start, batch_start + len(batch)), batch, embeddings)
+            ]
+            
+            try:
+                upsert_with_retry(client, collection_name, points)
+            except Exception as e:
+                return False, (
+                    f"Échec de l'envoi du lot {batch_start}-{batch_start + len(batch) - 1} "
+                    f"après {UPSERT_MAX_RETRIES} tentatives ({done} chunks déjà indexés) : {e}"
                 )
-            )
+            
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, total or done, time.perf_counter() - started)
         
-        client.upsert(collection_name=collection_name, points=points)
-        return True, f"✅ {len(chunks)} chunks ajoutés avec succès (IDs: {start_id} - {start_id + len(chunks) - 1})"
+        if done == 0:
+            return False, "Aucun chunk à indexer"
+        
+        if catalog_client:
+            update_catalog_entry(collection_name, doc_title, source_file)
+        return True, f"✅ {done} chunks ajoutés avec succès"
     except Exception as e:
         return False, str(e)
 
+def search_qdrant(collection_name: str, query: str, top_k: int = 5,
+                  source_file: str = None, doc_title: str = None, client=None, model_name: str = EMBEDDING_MODEL):
+    """Rechercher les chunks les plus proches d'une requête, avec filtres optionnels.
+
+    Retourne (points trouvés, durées en secondes {"embedding", "recherche"}, erreur).
+    """
+    try:
+        if client is None:
+            client, error = get_qdrant_client()
+            if error:
+                return None, None, error
+        
+        model = get_embedding_model(model_name)
+        if model is None:
+            return None, None, "Erreur lors du chargement du modèle d'embedding"
+        
+        started = time.perf_counter()
+        query_vector = model.encode(query, convert_to_numpy=True, show_progress_bar=False)
+        embedded = time.perf_counter()
+        
+        conditions = [
+            FieldCondition(key=field, match=MatchValue(value=value))
+            for field, value in (("source_file", source_file), ("doc_title", doc_title))
+            if value
+        ]
+        response = client.query_points(
+            collection_name=collection_name,
+            query=query_vector.tolist(),
+            query_filter=Filter(must=conditions) if conditions else None,
+            limit=top_k,
+            with_payload=True
+        )
+        searched = time.perf_counter()
+        
+        return response.points, {"embedding": embedded - started, "recherche": searched - embedded}, None
+    except Exception as e:
+        return None, None, str(e)
+
+def parse_point_id(value: str):
+    """Convertir un ID saisi en ID Qdrant : entier pour les anciens points, UUID sinon."""
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
 def remove_from_qdrant(removal_type: str, value: str, collection_name: str):
-    """Supprimer des documents de Qdrant."""
+    """Supprimer des documents de Qdrant via un filtre ou un sélecteur d'IDs côté serveur."""
     try:
         client, error = get_qdrant_client()
         if error:
             return False, error
         
-        point_ids = []
-        offset = None
-        
-        while True:
-            results, offset = client.scroll(
+        if removal_type == "id":
+            point_id = parse_point_id(value)
+            found = client.retrieve(
                 collection_name=collection_name,
-                limit=1000,
-                offset=offset,
-                with_payload=["source_file", "doc_title"]
+                ids=[point_id],
+                with_payload=["doc_title", "source_file"],
+                with_vectors=False
             )
-            
-            if not results:
-                break
-            
-            for point in results:
-                if removal_type == "source" and point.payload.get("source_file") == value:
-                    point_ids.append(point.id)
-                elif removal_type == "title" and point.payload.get("doc_title") == value:
-                    point_ids.append(point.id)
-                elif removal_type == "id" and str(point.id) == str(value):
-                    point_ids.append(point.id)
-            
-            if offset is None:
-                break
+            count = len(found)
+            selector = PointIdsList(points=[point_id])
+        elif removal_type in REMOVAL_FIELDS:
+            ensure_payload_indexes(collection_name)
+            removal_filter = Filter(must=[
+                FieldCondition(key=REMOVAL_FIELDS[removal_type], match=MatchValue(value=value))
+            ])
+            count = client.count(
+                collection_name=collection_name,
+                count_filter=removal_filter,
+                exact=True
+            ).count
+            selector = FilterSelector(filter=removal_filter)
+        else:
+            return False, f"Type de suppression inconnu : {removal_type}"
         
-        if not point_ids:
+        if count == 0:
             return False, f"Aucun document trouvé pour {removal_type}: '{value}'"
         
-        client.delete(collection_name=collection_name, points_selector=point_ids)
-        return True, f"✅ {len(point_ids)} chunks supprimés avec succès"
+        client.delete(collection_name=collection_name, points_selector=selector, wait=True)
+        
+        # Mettre à jour le catalogue des documents
+        if removal_type == "id":
+            for point in found:
+                update_catalog_entry(
+                    collection_name,
+                    point.payload.get("doc_title", "Unknown"),
+                    point.payload.get("source_file", "Unknown")
+                )
+        else:
+            remove_catalog_entries(collection_name, REMOVAL_FIELDS[removal_type], value)
+        
+        return True, f"✅ {count} chunks supprimés avec succès"
     except Exception as e:
         return False, str(e)
 
@@ -493,8 +1074,7 @@ def remove_from_qdrant(removal_type: str, value: str, collection_name: str):
 
 def hash_password(password: str) -> str:
     """Hasher un mot de passe avec bcrypt."""
-    salt = bcrypt.gensalt(rounds=12)
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    return workers.hash_password(password, BCRYPT_ROUNDS)
 
 def verify_password(password: str, hashed: str) -> bool:
     """Vérifier un mot de passe contre son hash."""
@@ -549,40 +1129,95 @@ def validate_password(password: str) -> tuple[bool, str]:
 # OPÉRATIONS BASE DE DONNÉES UTILISATEURS
 # =============================================================================
 
-def sync_mapping_to_mongo(mapping_data):
-    """Sync drive_file_mapping.json to MongoDB."""
-    try:
-        if not MONGO_URI:
-            st.warning("⚠️ MONGO_URI non configuré, impossible de sauvegarder le mapping dans MongoDB.")
-            return
+def upsert_mapping_entries(mapping_collection, entries: dict):
+    """Écrire des entrées du mapping Drive, chacune dans son propre document."""
+    now = datetime.utcnow()
+    operations = []
+    for key, entry in entries.items():
+        rel_path = push_to_google_drive.normalize_mapping_key(key)
+        operations.append(UpdateOne(
+            {"rel_path": rel_path},
+            {"$set": {**entry, "rel_path": rel_path, "updated_at": now}},
+            upsert=True
+        ))
+    for batch in iter_batches(operations, 1000):
+        mapping_collection.bulk_write(batch, ordered=False)
 
-        client = MongoClient(MONGO_URI)
-        db = client[MONGO_DB]
-        # Use a dedicated collection for configuration/mappings
-        config_collection = db["config"]
-        
-        # Update or insert the mapping document
-        # We use a fixed ID or name to identify this specific configuration
-        result = config_collection.update_one(
+def upsert_legacy_mapping_entries(config_collection, entries: dict):
+    """Reporter des entrées dans l'ancien document `config` du mapping (transition, voir DRIVE_MAPPING_LEGACY_SYNC)."""
+    now = datetime.utcnow()
+    operations = []
+    for key, entry in entries.items():
+        # $setField : les clés sont des chemins de fichiers, qui contiennent des points
+        operations.append(UpdateOne(
             {"config_name": "drive_file_mapping"},
-            {
-                "$set": {
-                    "config_name": "drive_file_mapping",
-                    "mapping": mapping_data,
-                    "updated_at": datetime.utcnow()
-                }
-            },
+            [{"$set": {
+                "mapping": {"$setField": {
+                    "field": key,
+                    "input": {"$ifNull": ["$mapping", {}]},
+                    "value": {"$literal": entry}
+                }},
+                "updated_at": now
+            }}],
             upsert=True
-        )
-        # st.success("✅ Mapping Google Drive synchronisé avec MongoDB")
-    except Exception as e:
-        st.error(f"❌ Erreur lors de la synchronisation MongoDB: {str(e)}")
+        ))
+    for batch in iter_batches(operations, 1000):
+        config_collection.bulk_write(batch, ordered=True)
+
+def sync_mapping_to_mongo(entries: dict):
+    """Synchroniser dans MongoDB les seules entrées du mapping Drive modifiées. Retourne une erreur ou None."""
+    db, error = get_mongo_db()
+    if error:
+        return error
+    try:
+        upsert_mapping_entries(db[MONGO_DRIVE_MAPPING_COLLECTION], entries)
+        if DRIVE_MAPPING_LEGACY_SYNC:
+            upsert_legacy_mapping_entries(db["config"], entries)
+        return None
+    except PyMongoError as e:
+        return str(e)
+
+def get_drive_mapping_entry(rel_path: str):
+    """Retrouver l'entrée Drive d'un fichier par son chemin relatif dans RAG DATA. Retourne (entrée, erreur)."""
+    mapping_collection, error = get_drive_mapping_collection()
+    if error:
+        return None, error
+    try:
+        return mapping_collection.find_one(
+            {"rel_path": push_to_google_drive.normalize_mapping_key(rel_path)},
+            {"_id": 0, "rel_path": 0, "updated_at": 0}
+        ), None
+    except PyMongoError as e:
+        return None, str(e)
+
+def users_filter(prefix: str = "") -> dict:
+    """Filtre de recherche par préfixe du nom d'utilisateur (servi par l'index `username`)."""
+    if not prefix:
+        return {}
+    return {"username": {"$regex": f"^{re.escape(prefix)}"}}
+
+@st.cache_data(ttl=USERS_CACHE_TTL, show_spinner=False)
+def find_users(_collection, prefix: str = "", skip: int = 0, limit: int = 0) -> list:
+    """Lire une page d'utilisateurs triés par nom (mise en cache quelques secondes)."""
+    users = _collection.find(
+        users_filter(prefix), {"username": 1, "password_plain": 1, "password": 1, "_id": 0}
+    ).sort("username", 1).skip(skip).limit(limit)
+    return list(users)
+
+@st.cache_data(ttl=USERS_CACHE_TTL, show_spinner=False)
+def count_users(_collection, prefix: str = "") -> int:
+    """Compter les utilisateurs correspondant à la recherche (mis en cache quelques secondes)."""
+    return _collection.count_documents(users_filter(prefix))
 
-def get_all_users(collection) -> list:
-    """Récupérer tous les utilisateurs de la base de données."""
+def clear_users_cache():
+    """Invalider les lectures d'utilisateurs en cache après une écriture."""
+    find_users.clear()
+    count_users.clear()
+
+def get_all_users(collection, prefix: str = "", skip: int = 0, limit: int = 0) -> list:
+    """Récupérer les utilisateurs de la base de données, filtrés par préfixe et paginés."""
     try:
-        users = collection.find({}, {"username": 1, "password_plain": 1, "password": 1, "_id": 0}).sort("username", 1)
-        return list(users)
+        return find_users(collection, prefix, skip, limit)
     except PyMongoError as e:
         st.error(f"❌ Échec de la récupération des utilisateurs : {str(e)}")
         return []
@@ -616,6 +1251,7 @@ def add_user(collection, username: str, password: str) -> tuple[bool, str]:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         })
+        clear_users_cache()
         return True, f"Utilisateur '{username}' créé avec succès"
     except PyMongoError as e:
         return False, f"Erreur base de données : {str(e)}"
@@ -651,6 +1287,7 @@ def edit_user(collection, old_username: str, new_username: str, new_password: st
         if result.matched_count == 0:
             return False, f"Utilisateur '{old_username}' non trouvé"
         
+        clear_users_cache()
         if new_username != old_username:
             return True, f"Utilisateur mis à jour : '{old_username}' → '{new_username}'"
         else:
@@ -666,41 +1303,338 @@ def delete_user(collection, username: str) -> tuple[bool, str]:
         if result.deleted_count == 0:
             return False, f"Utilisateur '{username}' non trouvé"
         
+        clear_users_cache()
         return True, f"Utilisateur '{username}' supprimé avec succès"
     except PyMongoError as e:
         return False, f"Erreur base de données : {str(e)}"
 
+def import_users_csv(collection, data: bytes) -> tuple[list, str]:
+    """Importer des utilisateurs depuis un CSV (colonnes `username`, `password`).
+
+    Les lignes sont validées, les mots de passe hashés en parallèle dans le pool
+    de processus, puis insérés en un seul `insert_many` non ordonné.
+    Retourne (rapport par ligne, erreur).
+    """
+    try:
+        reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        return [], "Le fichier doit être encodé en UTF-8"
+    
+    fields = {(name or "").strip().lower() for name in reader.fieldnames or []}
+    if not {"username", "password"} <= fields:
+        return [], "Colonnes attendues : username, password"
+    
+    report, valid_rows, seen = [], [], set()
+    for line, row in enumerate(reader, start=2):
+        if len(report) >= USER_IMPORT_MAX_ROWS:
+            return [], f"Le fichier dépasse {USER_IMPORT_MAX_ROWS} lignes"
+        row = {(key or "").strip().lower(): (value or "") for key, value in row.items()}
+        username, password = row.get("username", "").strip(), row.get("password", "")
+        entry = {"Ligne": line, "Nom d'utilisateur": username, "Statut": "", "Détail": ""}
+        report.append(entry)
+        
+        is_valid, error_msg = validate_username(username)
+        if is_valid:
+            is_valid, error_msg = validate_password(password)
+        if is_valid and username in seen:
+            is_valid, error_msg = False, "Doublon dans le fichier"
+        if not is_valid:
+            entry["Statut"], entry["Détail"] = "❌ Rejeté", error_msg
+            continue
+        seen.add(username)
+        valid_rows.append((entry, username, password))
+    
+    # Les utilisateurs existants sont écartés avant le hachage (coûteux)
+    try:
+        existing = {
+            user["username"] for user in collection.find(
+                {"username": {"$in": [username for _, username, _ in valid_rows]}}, {"username": 1}
+            )
+        }
+    except PyMongoError as e:
+        return [], f"Erreur base de données : {str(e)}"
+    to_insert = []
+    for entry, username, password in valid_rows:
+        if username in existing:
+            entry["Statut"], entry["Détail"] = "❌ Rejeté", f"L'utilisateur '{username}' existe déjà"
+        else:
+            to_insert.append((entry, username, password))
+    if not to_insert:
+        return report, None
+    
+    # bcrypt libère le GIL mais reste CPU : un hachage par cœur dans le pool de processus
+    passwords = [password for _, _, password in to_insert]
+    try:
+        # Résultats matérialisés dans la tâche : map() lève BrokenProcessPool à l'itération
+        hashes = run_in_process_pool(lambda pool: list(pool.map(
+            workers.hash_password, passwords, [BCRYPT_ROUNDS] * len(passwords),
+            chunksize=max(len(passwords) // (PDF_EXTRACTION_WORKERS * 4), 1)
+        )))
+    except BrokenProcessPool:
+        return [], "Le pool de hachage des mots de passe s'est arrêté, réessayez l'import"
+    now = datetime.utcnow()
+    documents = [
+        {
+            "username": username,
+            "password_plain": password,
+            "password": hashed_password,
+            "created_at": now,
+            "updated_at": now
+        }
+        for (_, username, password), hashed_password in zip(to_insert, hashes)
+    ]
+    
+    failed = {}
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed[write_error["index"]] = (
+                "L'utilisateur existe déjà" if write_error.get("code") == 11000 else write_error.get("errmsg", "")
+            )
+    except PyMongoError as e:
+        return [], f"Erreur base de données : {str(e)}"
+    finally:
+        clear_users_cache()
+    
+    for index, (entry, _, _) in enumerate(to_insert):
+        if index in failed:
+            entry["Statut"], entry["Détail"] = "❌ Rejeté", failed[index]
+        else:
+            entry["Statut"] = "✅ Créé"
+    return report, None
+
 # =============================================================================
 # FONCTIONS BASE DE CONNAISSANCES
 # =============================================================================
 
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
-    """Diviser le texte en chunks chevauchants."""
-    chunks = []
+def iter_char_chunk_spans(text: str, chunk_size: int = 1000, overlap: int = 200):
+    """Produire les bornes de chunks de taille fixe en caractères (découpage des anciennes tâches)."""
+    step = max(chunk_size - overlap, 1)
     start = 0
     while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - overlap
-    return chunks
+        yield start, min(start + chunk_size, len(text))
+        start += step
 
-def extract_text_from_pdf(uploaded_file):
-    """Extraire le texte d'un fichier PDF téléchargé."""
+def iter_sentence_spans(text: str):
+    """Produire les bornes (début, fin) des phrases non vides du texte."""
+    start = 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        if text[start:boundary.start()].strip():
+            yield start, boundary.start()
+        start = boundary.end()
+    if text[start:].strip():
+        yield start, len(text)
+
+def iter_token_chunk_spans(text: str, tokenizer, max_tokens: int, overlap_tokens: int):
+    """Regrouper les phrases en chunks d'au plus `max_tokens` tokens et produire leurs bornes.
+
+    Le texte est parcouru une seule fois : chaque phrase est tokenisée une fois
+    (par lots) puis entre et sort une fois de la fenêtre glissante. Les dernières
+    phrases d'un chunk (au plus `overlap_tokens` tokens) ouvrent le suivant ; une
+    phrase trop longue est coupée sur des frontières de tokens.
+    """
+    window = deque()  # (début, fin, nombre de tokens)
+    window_tokens = 0
+    pending = False  # la fenêtre contient des phrases pas encore produites
+    
+    for sentences in iter_batches(iter_sentence_spans(text), TOKENIZE_BATCH_SIZE):
+        encoded = tokenizer(
+            [text[start:end] for start, end in sentences],
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=True
+        )
+        for (start, end), offsets in zip(sentences, encoded["offset_mapping"]):
+            token_count = len(offsets)
+            if token_count > max_tokens:
+                if pending:
+                    yield window[0][0], window[-1][1]
+                window.clear()
+                window_tokens, pending = 0, False
+                step = max(max_tokens - overlap_tokens, 1)
+                for first in range(0, token_count, step):
+                    last = min(first + max_tokens, token_count)
+                    yield start + offsets[first][0], start + offsets[last - 1][1]
+                    if last == token_count:
+                        break
+                continue
+            
+            if window_tokens + token_count > max_tokens:
+                if pending:
+                    yield window[0][0], window[-1][1]
+                    pending = False
+                while window and (window_tokens > overlap_tokens or window_tokens + token_count > max_tokens):
+                    window_tokens -= window.popleft()[2]
+            window.append((start, end, token_count))
+            window_tokens += token_count
+            pending = True
+    
+    if pending:
+        yield window[0][0], window[-1][1]
+
+@st.cache_resource
+def get_chunker_tokenizers():
+    """Tokenizers du découpage, un par thread et par modèle, partagés entre les reruns."""
+    return threading.local()
+
+def get_chunker_tokenizer(model, model_name: str = EMBEDDING_MODEL):
+    """Instance du tokenizer du modèle propre au thread courant, utilisée sans troncature.
+
+    Le tokenizer Rust du modèle est modifié par chaque appel (troncature activée
+    par `encode`, désactivée par le découpage) : partagé entre threads, il lève
+    « Already borrowed » et peut tronquer les phrases vues par le découpage.
+    L'instance est rechargée depuis les fichiers du modèle plutôt que copiée,
+    pour ne jamais toucher au tokenizer partagé pendant un `encode`.
+    """
+    store = get_chunker_tokenizers()
+    tokenizers = getattr(store, "by_model", None)
+    if tokenizers is None:
+        tokenizers = store.by_model = {}
+    if model_name not in tokenizers:
+        from transformers import AutoTokenizer
+        tokenizers[model_name] = AutoTokenizer.from_pretrained(model.tokenizer.name_or_path)
+    return tokenizers[model_name]
+
+def token_chunk_limits(model, chunk_size: int, overlap: int) -> tuple[int, int]:
+    """Borner la taille (en tokens) à ce que le modèle encode réellement, hors [CLS]/[SEP]."""
+    max_tokens = max(min(chunk_size, model.max_seq_length - 2), 1)
+    return max_tokens, min(overlap, max_tokens // 2)
+
+def iter_chunks(text: str, chunk_size: int = CHUNK_MAX_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS,
+                chunking: str = "tokens", pages=None, model_name: str = EMBEDDING_MODEL):
+    """Produire les chunks du texte un par un : phrases regroupées jusqu'à la limite de tokens du modèle.
+
+    Chaque chunk est un dict {content, char_start, char_end, page, page_end} :
+    positions dans `text` et pages couvertes, d'après les `pages` du PDF dont
+    `text` est issu (`join_pdf_pages`) ; sans pages, tout le texte est la page 1.
+    `chunking="chars"` conserve le découpage en caractères des tâches créées avant
+    le découpage par tokens, pour que leur reprise retombe sur les mêmes chunks.
+    """
+    if chunking == "chars":
+        spans = iter_char_chunk_spans(text, chunk_size, overlap)
+    else:
+        model = get_embedding_model(model_name)
+        if model is None:
+            raise RuntimeError("Erreur lors du chargement du modèle d'embedding")
+        max_tokens, overlap_tokens = token_chunk_limits(model, chunk_size, overlap)
+        tokenizer = get_chunker_tokenizer(model, model_name)
+        spans = iter_token_chunk_spans(text, tokenizer, max_tokens, overlap_tokens)
+    
+    page_starts, page_numbers = pdf_page_starts(pages) if pages else ([0], [1])
+    for start, end in spans:
+        yield {
+            "content": text[start:end],
+            "char_start": start,
+            "char_end": end,
+            "page": page_numbers[bisect_right(page_starts, start) - 1],
+            "page_end": page_numbers[bisect_right(page_starts, max(end - 1, start)) - 1]
+        }
+
+def chunk_text(text: str, chunk_size: int = CHUNK_MAX_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS,
+               chunking: str = "tokens", pages=None, model_name: str = EMBEDDING_MODEL) -> list:
+    """Diviser le texte en chunks chevauchants (voir `iter_chunks`)."""
+    return list(iter_chunks(text, chunk_size, overlap, chunking, pages, model_name))
+
+def extract_pdf_pages(uploaded_file):
+    """Extraire le texte d'un PDF page par page, en parallèle pour les gros documents.
+
+    Accepte un fichier téléchargé ou un chemin. Retourne ([(page, texte, secondes), ...], erreur).
+    """
     if not PDF_SUPPORT:
         return None, "Le support PDF nécessite 'pdfplumber'. Installez avec : pip install pdfplumber"
     
+    tmp_path = None
     try:
-        content = ""
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", message=".*FontBBox.*")
-            with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
-                    content += page.extract_text() or ""
-                    content += "\n\n"
-        return content, None
+        # Même fichier déjà extrait : on réutilise le texte du cache disque
+        file_hash = file_sha256(uploaded_file)
+        cache = get_extraction_cache()
+        cached = cache.get(file_hash)
+        if cached is not None:
+            return [tuple(record) for record in json.loads(cached)], None
+        
+        if isinstance(uploaded_file, (str, os.PathLike)):
+            pdf_path = uploaded_file
+        else:
+            # Les processus enfants relisent le PDF depuis le disque
+            uploaded_file.seek(0)
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                shutil.copyfileobj(uploaded_file, tmp)
+                tmp_path = pdf_path = tmp.name
+        
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+        
+        shard_count = min(PDF_EXTRACTION_WORKERS, math.ceil(page_count / PDF_PARALLEL_MIN_PAGES))
+        if shard_count <= 1:
+            pages = workers.extract_pdf_page_range(pdf_path, 0, page_count)
+        else:
+            # Découpage en plages de pages contiguës, une par processus
+            shard_size = math.ceil(page_count / shard_count)
+            
+            def extract_shards(pool):
+                futures = [
+                    pool.submit(
+                        workers.extract_pdf_page_range,
+                        pdf_path, first, min(first + shard_size, page_count)
+                    )
+                    for first in range(0, page_count, shard_size)
+                ]
+                return [record for future in futures for record in future.result()]
+            
+            pages = run_in_process_pool(extract_shards)
+        
+        cache.put(file_hash, json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+        return pages, None
     except Exception as e:
         return None, f"Erreur lors de la lecture du PDF : {e}"
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+def join_pdf_pages(pages) -> str:
+    """Assembler le texte des pages en une seule chaîne (une seule concaténation)."""
+    return "".join(f"{text}\n\n" for _, text, _ in pages)
+
+def pdf_page_starts(pages) -> tuple[list, list]:
+    """Positions de début de chaque page dans le texte de `join_pdf_pages`, et numéros de page."""
+    starts, numbers, offset = [], [], 0
+    for page, text, _ in pages:
+        starts.append(offset)
+        numbers.append(page)
+        offset += len(text) + 2
+    return starts, numbers
+
+def extract_text_from_pdf(uploaded_file):
+    """Extraire le texte d'un fichier PDF téléchargé."""
+    pages, error = extract_pdf_pages(uploaded_file)
+    if error:
+        return None, error
+    return join_pdf_pages(pages), None
+
+def extract_uploaded_file(uploaded_file, file_extension: str):
+    """Extraire le texte d'un fichier téléchargé. Retourne (contenu, pages PDF ou None, erreur)."""
+    if file_extension == ".pdf":
+        pages, error = extract_pdf_pages(uploaded_file)
+        return (join_pdf_pages(pages) if pages else None), pages, error
+    
+    uploaded_file.seek(0)
+    content, error = extract_text_from_file(uploaded_file)
+    return content, None, error
+
+def memoize_in_session(store_name: str, key, compute, max_entries: int = SESSION_MEMO_MAX_ENTRIES):
+    """Mémoriser `compute()` dans la session Streamlit sous `key` (LRU borné à `max_entries`)."""
+    store = st.session_state.setdefault(store_name, {})
+    if key in store:
+        # Remettre l'entrée en fin de dictionnaire (la plus récente)
+        store[key] = store.pop(key)
+        return store[key]
+    
+    value = compute()
+    store[key] = value
+    while len(store) > max_entries:
+        store.pop(next(iter(store)))
+    return value
 
 def extract_text_from_file(uploaded_file):
     """Extraire le texte d'un fichier texte téléchargé."""
@@ -715,6 +1649,478 @@ def extract_text_from_file(uploaded_file):
         except Exception as e:
             return None, f"Erreur lors de la lecture du fichier : {e}"
 
+def extract_local_file(file_path: str):
+    """Extraire le texte d'un fichier local. Retourne (contenu, pages PDF ou None, erreur)."""
+    file_extension = Path(file_path).suffix.lower()
+    if file_extension == ".pdf":
+        return extract_uploaded_file(file_path, file_extension)
+    with open(file_path, "rb") as f:
+        return extract_uploaded_file(f, file_extension)
+
+def save_to_rag_data(file_name: str, data: bytes) -> str:
+    """Enregistrer un fichier dans le dossier local RAG DATA et retourner son chemin."""
+    os.makedirs(RAG_DATA_DIR, exist_ok=True)
+    local_file_path = os.path.join(RAG_DATA_DIR, file_name)
+    with open(local_file_path, "wb") as f:
+        f.write(data)
+    return local_file_path
+
+def push_file_to_drive(local_file_path: str, progress_callback=None):
+    """Envoyer un fichier de RAG DATA sur Google Drive et mettre à jour le mapping.
+
+    L'envoi se fait par morceaux reprenables ; `progress_callback(octets_envoyés, total)`
+    est appelé après chaque morceau. Un fichier déjà présent dans le mapping est
+    remplacé sur place (même ID), ou laissé tel quel si son contenu n'a pas changé ;
+    s'il a été supprimé sur Drive entre-temps, il est renvoyé comme nouveau fichier.
+    L'entrée est lue dans MongoDB, avec repli sur le mapping local, et seule
+    l'entrée du fichier est écrite : en ajout au journal du mapping local et
+    dans MongoDB. Retourne (file_id, erreur).
+    """
+    try:
+        key = push_to_google_drive.mapping_key(local_file_path)
+        entry, _ = get_drive_mapping_entry(key)
+        if entry is None:
+            # MongoDB injoignable, ou synchronisation précédente en échec : repli sur le mapping local
+            entry = push_to_google_drive.load_mapping().get(key)
+        file_entry = {}
+        
+        if entry and entry.get("md5") and entry["md5"] == push_to_google_drive.file_md5(local_file_path):
+            # Déjà sur Drive (ex. relance après un échec de synchronisation MongoDB)
+            file_id = entry["file_id"]
+            file_entry[key] = entry
+        else:
+            service = push_to_google_drive.authenticate()
+            if entry:
+                try:
+                    file_id = push_to_google_drive.update_file(
+                        service, entry["file_id"], local_file_path, file_entry, key,
+                        progress_callback=progress_callback
+                    )
+                except push_to_google_drive.DriveFileMissing:
+                    # Supprimé sur Drive : l'entrée est obsolète, renvoi comme nouveau fichier
+                    entry = None
+            if not entry:
+                # Dossier RAG DATA sur Drive : trouvé ou créé une fois, puis servi par le cache du processus
+                rag_folder_id = push_to_google_drive.resolve_folder_path(
+                    service, [RAG_DATA_DIR], push_to_google_drive.GOOGLE_DRIVE_PARENT_FOLDER_ID
+                )
+                if not rag_folder_id:
+                    return None, "Impossible de trouver ou créer le dossier RAG DATA sur Google Drive"
+                
+                file_id = push_to_google_drive.upload_file(
+                    service, local_file_path, rag_folder_id, file_entry,
+                    progress_callback=progress_callback
+                )
+            if not file_id:
+                # Le dossier en cache a peut-être été supprimé sur Drive
+                push_to_google_drive.clear_folder_cache()
+                return None, "Échec de l'upload sur Google Drive"
+            
+            push_to_google_drive.append_mapping_entries(file_entry)
+        
+        mongo_error = sync_mapping_to_mongo(file_entry)
+        if mongo_error:
+            return None, f"Fichier envoyé (ID: {file_id}) mais mapping MongoDB non synchronisé : {mongo_error}"
+        return file_id, None
+    except Exception as e:
+        return None, f"Erreur lors de l'upload Drive: {str(e)}"
+
+def list_ingestible_files(root_dir: str) -> list:
+    """Lister récursivement les fichiers pris en charge d'un dossier."""
+    paths = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        for name in filenames:
+            if Path(name).suffix.lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(dirpath, name))
+    return sorted(paths)
+
+def extract_zip_to_rag_data(zip_name: str, data: bytes) -> str:
+    """Décompresser une archive ZIP dans RAG DATA/<nom de l'archive> et retourner ce dossier."""
+    target_dir = os.path.join(RAG_DATA_DIR, Path(zip_name).stem)
+    os.makedirs(target_dir, exist_ok=True)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        # extractall neutralise les chemins absolus et les « .. »
+        archive.extractall(target_dir)
+    return target_dir
+
+def iter_extracted_files(file_paths: list):
+    """Extraire des fichiers en parallèle et produire (chemin, contenu, pages PDF ou None, erreur) au fil de l'eau.
+
+    Au plus PDF_EXTRACTION_WINDOW PDF sont soumis au pool à la fois, les fichiers
+    en cache sont relus au moment de les produire et chaque résultat est oublié
+    une fois produit : la mémoire ne dépend pas de la taille de l'import.
+    """
+    cache = get_extraction_cache()
+    paths = iter(file_paths)
+    exhausted = False
+    pending = {}  # future -> (chemin, hash, pool, nouvelle tentative permise)
+    
+    def submit(path, file_hash, retry_allowed):
+        pool = get_process_pool()
+        pending[pool.submit(workers.extract_pdf_page_range, path)] = (path, file_hash, pool, retry_allowed)
+    
+    while pending or not exhausted:
+        # Remplir la fenêtre : l'extraction avance pendant que l'appelant encode ;
+        # fichiers non PDF et PDF en cache sont produits au passage
+        while not exhausted and len(pending) < PDF_EXTRACTION_WINDOW:
+            path = next(paths, None)
+            if path is None:
+                exhausted = True
+                break
+            if Path(path).suffix.lower() != ".pdf" or not PDF_SUPPORT:
+                content, _, error = extract_local_file(path)
+                yield path, content, None, error
+                continue
+            file_hash = file_sha256(path)
+            cached = cache.get(file_hash)
+            if cached is not None:
+                pages = json.loads(cached)
+                yield path, join_pdf_pages(pages), pages, None
+                continue
+            submit(path, file_hash, True)
+        
+        if not pending:
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, file_hash, future_pool, retry_allowed = pending.pop(future)
+            try:
+                pages = future.result()
+            except BrokenProcessPool as e:
+                # Un worker mort casse le pool et toutes ses tâches en cours : elles sont
+                # soumises une seconde fois à un pool neuf, puis déclarées en échec
+                reset_process_pool(future_pool)
+                if retry_allowed:
+                    submit(path, file_hash, False)
+                else:
+                    yield path, None, None, f"Erreur lors de la lecture du PDF (processus d'extraction arrêté) : {e}"
+                continue
+            except Exception as e:
+                yield path, None, None, f"Erreur lors de la lecture du PDF : {e}"
+                continue
+            cache.put(file_hash, json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+            yield path, join_pdf_pages(pages), pages, None
+
+def ingest_files(file_paths: list, root_dir: str, collection_name: str, chunk_size: int, overlap: int,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, progress_callback=None, chunking: str = "tokens"):
+    """Ingérer plusieurs fichiers : extraction parallèle et lots d'embeddings partagés entre documents.
+
+    `progress_callback(chunks_done, files_done, files_total, elapsed)` est appelé
+    après chaque lot. Retourne (rapport par fichier, erreur).
+    """
+    try:
+        client, error = get_qdrant_client()
+        if error:
+            return None, error
+        
+        model = get_embedding_model()
+        if model is None:
+            return None, "Erreur lors du chargement du modèle d'embedding"
+        
+        ensure_payload_indexes(collection_name)
+        
+        report = {
+            path: {
+                "Fichier": Path(os.path.relpath(path, root_dir)).as_posix(),
+                "Titre": Path(path).stem,
+                "Pages": None,
+                "Chunks": 0,
+                "Statut": "",
+                "Erreur": ""
+            }
+            for path in file_paths
+        }
+        files_done = 0
+        
+        def iter_records():
+            nonlocal files_done
+            for path, content, pages, extract_error in iter_extracted_files(file_paths):
+                entry = report[path]
+                entry["Pages"] = len(pages) if pages else None
+                if extract_error or not content:
+                    entry["Erreur"] = extract_error or "Aucun texte extrait"
+                else:
+                    for chunk_id, chunk in enumerate(iter_chunks(content, chunk_size, overlap, chunking, pages)):
+                        entry["Chunks"] += 1
+                        yield path, chunk_id, chunk
+                files_done += 1
+        
+        chunks_done = 0
+        started = time.perf_counter()
+        # Les lots mélangent les documents : le modèle reste alimenté en lots pleins
+        for batch in iter_batches(iter_records(), batch_size):
+            embeddings = encode_with_cache(model, [chunk["content"] for _, _, chunk in batch], batch_size)
+            points = [
+                build_point(collection_name, report[path]["Titre"], report[path]["Fichier"], chunk_id, chunk, embedding)
+                for (path, chunk_id, chunk), embedding in zip(batch, embeddings)
+            ]
+            try:
+                upsert_with_retry(client, collection_name, points)
+            except Exception as e:
+                for path in {path for path, _, _ in batch}:
+                    report[path]["Erreur"] = f"Échec de l'envoi d'un lot : {e}"
+            
+            chunks_done += len(batch)
+            if progress_callback:
+                progress_callback(chunks_done, files_done, len(file_paths), time.perf_counter() - started)
+        
+        for entry in report.values():
+            if entry["Erreur"]:
+                entry["Statut"] = "❌ Échec"
+            elif entry["Chunks"] == 0:
+                entry["Statut"] = "⚠️ Vide"
+            else:
+                entry["Statut"] = "✅ Indexé"
+                update_catalog_entry(collection_name, entry["Titre"], entry["Fichier"])
+        
+        return list(report.values()), None
+    except Exception as e:
+        return None, str(e)
+
+# =============================================================================
+# FILE D'ATTENTE D'INGESTION
+# =============================================================================
+
+@st.cache_resource
+def get_job_runner():
+    """Initialiser une fois par processus le stockage des tâches et le pool de workers."""
+    store = JobStore(INGESTION_JOBS_DB)
+    # Tâches restées en cours : le processus précédent s'est arrêté
+    store.mark_interrupted()
+    executor = ThreadPoolExecutor(max_workers=INGESTION_WORKERS, thread_name_prefix="ingestion")
+    return store, executor
+
+@st.cache_resource
+def get_drive_executor():
+    """Pool dédié aux envois Google Drive, hors du chemin critique de l'indexation."""
+    return ThreadPoolExecutor(max_workers=DRIVE_UPLOAD_WORKERS, thread_name_prefix="drive")
+
+def enqueue_ingestion_job(params: dict, kind: str = "ingestion") -> int:
+    """Enregistrer une tâche d'ingestion et la confier au pool de workers."""
+    store, executor = get_job_runner()
+    job_id = store.create(kind, params)
+    executor.submit(run_job, job_id)
+    return job_id
+
+def retry_ingestion_job(job_id: int) -> tuple[bool, str]:
+    """Relancer la partie échouée d'une tâche : indexation (reprise au dernier lot envoyé) et/ou envoi Drive."""
+    store, executor = get_job_runner()
+    job = store.get(job_id)
+    if job is None:
+        return False, f"Tâche #{job_id} introuvable"
+    
+    index_retry = job["status"] in RETRYABLE_STATUSES
+    drive_retry = job["kind"] == "ingestion" and job["drive_status"] in RETRYABLE_STATUSES
+    if not index_retry and not drive_retry:
+        return False, f"La tâche #{job_id} ne peut pas être relancée ({job['status']})"
+    
+    if not index_retry:
+        # Document déjà indexé : seul l'envoi Drive est rejoué
+        if not start_drive_leg(job_id, RETRYABLE_STATUSES):
+            return False, f"L'envoi Google Drive de la tâche #{job_id} est déjà relancé"
+        return True, f"Envoi Google Drive de la tâche #{job_id} relancé"
+    
+    # Réclamation atomique : un double clic ou une autre session ne relance pas la tâche deux fois
+    if not store.update_if(job_id, "status", RETRYABLE_STATUSES, status=STATUS_QUEUED, error=None):
+        return False, f"La tâche #{job_id} est déjà relancée"
+    executor.submit(run_job, job_id)
+    if job["kind"] == "bulk_ingestion":
+        return True, f"Tâche #{job_id} relancée (les chunks déjà indexés sont réécrits à l'identique)"
+    return True, f"Tâche #{job_id} relancée (reprise au chunk {job['done']})"
+
+def start_drive_leg(job_id: int, expected=(None, *RETRYABLE_STATUSES)) -> bool:
+    """Mettre l'envoi Google Drive d'une tâche en file sur le pool Drive.
+
+    L'envoi n'est soumis que si son statut vaut encore l'une des valeurs
+    `expected` (jamais lancé, en échec ou interrompu par défaut). Retourne True s'il a été soumis.
+    """
+    store, _ = get_job_runner()
+    if not store.update_if(
+        job_id, "drive_status", expected,
+        drive_status=STATUS_QUEUED, drive_message=None, drive_done=0, drive_total=0
+    ):
+        return False
+    get_drive_executor().submit(run_drive_leg, job_id)
+    return True
+
+def run_drive_leg(job_id: int):
+    """Envoyer le fichier d'une tâche sur Google Drive, avec son propre statut."""
+    store, _ = get_job_runner()
+    job = store.get(job_id)
+    store.update(job_id, drive_status=STATUS_RUNNING)
+    
+    def report_drive(sent, total):
+        store.update(job_id, drive_done=sent, drive_total=total)
+    
+    try:
+        file_id, drive_error = push_file_to_drive(job["params"]["local_path"], report_drive)
+    except Exception as e:
+        file_id, drive_error = None, f"Erreur lors de l'envoi Google Drive: {str(e)}"
+    if drive_error:
+        store.update(job_id, drive_status=STATUS_FAILED, drive_message=drive_error)
+    else:
+        store.update(job_id, drive_status=STATUS_DONE, drive_message=f"ID: {file_id}")
+
+def run_job(job_id: int):
+    """Exécuter une tâche selon son type."""
+    store, _ = get_job_runner()
+    job = store.get(job_id)
+    if job["kind"] == "bulk_ingestion":
+        run_bulk_ingestion_job(job_id)
+    else:
+        run_ingestion_job(job_id)
+
+def run_ingestion_job(job_id: int):
+    """Exécuter une tâche d'ingestion : extraction, embeddings et upsert, Drive en parallèle."""
+    store, _ = get_job_runner()
+    job = store.get(job_id)
+    params = job["params"]
+    store.update(
+        job_id,
+        status=STATUS_RUNNING,
+        attempts=job["attempts"] + 1,
+        started_at=time.time(),
+        finished_at=None
+    )
+    
+    try:
+        # 1. Google Drive sur son propre pool : le document devient cherchable
+        #    dès que ses embeddings sont envoyés, sans attendre Drive
+        #    (non rejoué s'il a réussi ou est en cours)
+        start_drive_leg(job_id)
+        
+        # 2. Extraction et découpage (déterministes : mêmes chunks à chaque tentative)
+        store.update(job_id, stage="extraction")
+        content, pages, error = extract_local_file(params["local_path"])
+        if error or not content:
+            raise RuntimeError(error or "Aucun texte extrait du fichier")
+        chunks = chunk_text(
+            content, params["chunk_size"], params["overlap"], params.get("chunking", "chars"), pages
+        )
+        
+        # 3. Embeddings et upsert, en reprenant après le dernier lot confirmé
+        resume_from = min(job["done"] or 0, len(chunks))
+        store.update(job_id, stage="indexation", total=len(chunks), done=resume_from)
+        
+        def report(done, total, elapsed):
+            rate = (done - resume_from) / elapsed if elapsed > 0 else 0.0
+            store.update(job_id, done=done, rate=rate)
+        
+        success, message = add_chunks_to_qdrant(
+            chunks[resume_from:], params["title"], params["file_name"], params["collection"],
+            batch_size=params["batch_size"],
+            progress_callback=report,
+            total=len(chunks),
+            start_index=resume_from
+        )
+        if not success:
+            raise RuntimeError(message)
+        
+        store.update(job_id, status=STATUS_DONE, stage="terminée", message=message, finished_at=time.time())
+    except Exception as e:
+        store.update(job_id, status=STATUS_FAILED, error=str(e), finished_at=time.time())
+
+def run_bulk_ingestion_job(job_id: int):
+    """Exécuter une tâche d'import en masse et enregistrer le rapport par fichier."""
+    store, _ = get_job_runner()
+    job = store.get(job_id)
+    params = job["params"]
+    file_paths = params["paths"]
+    store.update(
+        job_id,
+        status=STATUS_RUNNING,
+        stage="extraction",
+        attempts=job["attempts"] + 1,
+        total=len(file_paths),
+        done=0,
+        started_at=time.time(),
+        finished_at=None
+    )
+    
+    def report_progress(chunks_done, files_done, files_total, elapsed):
+        rate = chunks_done / elapsed if elapsed > 0 else 0.0
+        store.update(job_id, stage=f"indexation ({chunks_done:,} chunks)", done=files_done, rate=rate)
+    
+    try:
+        report, error = ingest_files(
+            file_paths, params["root_dir"], params["collection"],
+            params["chunk_size"], params["overlap"], params["batch_size"],
+            progress_callback=report_progress,
+            chunking=params.get("chunking", "chars")
+        )
+        if error:
+            raise RuntimeError(error)
+        
+        failed = sum(1 for entry in report if entry["Erreur"])
+        indexed_chunks = sum(entry["Chunks"] for entry in report if not entry["Erreur"])
+        store.update(
+            job_id,
+            status=STATUS_FAILED if failed == len(report) else STATUS_DONE,
+            stage="terminée",
+            done=len(file_paths),
+            result=report,
+            message=f"✅ {len(report) - failed}/{len(report)} fichiers indexés ({indexed_chunks:,} chunks)",
+            error=f"{failed} fichier(s) en échec — voir le rapport" if failed else None,
+            finished_at=time.time()
+        )
+    except Exception as e:
+        store.update(job_id, status=STATUS_FAILED, error=str(e), finished_at=time.time())
+
+def job_progress_text(job: dict) -> str:
+    """Résumé lisible de l'avancement d'une tâche."""
+    if job["kind"] == "bulk_ingestion":
+        return (
+            f"#{job['id']} import en masse — {job.get('stage') or 'en attente'} : "
+            f"{job['done']:,}/{job['total']:,} fichiers — {job['rate']:.1f} chunks/s"
+        )
+    return (
+        f"#{job['id']} {job['params'].get('file_name', '')} — {job.get('stage') or 'en attente'} : "
+        f"{job['done']:,}/{job['total']:,} chunks — {job['rate']:.1f} chunks/s"
+    )
+
+def follow_job(job_id: int, on_indexed=None):
+    """Afficher la progression d'une tâche tant que la page reste ouverte.
+
+    Indexation et envoi Drive sont suivis séparément : `on_indexed(job)` est
+    appelé dès la fin de l'indexation, sans attendre l'envoi Drive.
+    """
+    store, _ = get_job_runner()
+    drive_bar = None
+    progress_bar = st.progress(0.0, text=f"⏳ Tâche #{job_id} en attente...")
+    indexed_reported = False
+    
+    while True:
+        job = store.get(job_id)
+        index_active = job["status"] in (STATUS_QUEUED, STATUS_RUNNING)
+        drive_active = job["drive_status"] in (STATUS_QUEUED, STATUS_RUNNING)
+        
+        if drive_active and job["drive_total"]:
+            if drive_bar is None:
+                drive_bar = st.progress(0.0)
+            drive_bar.progress(
+                min(job["drive_done"] / job["drive_total"], 1.0),
+                text=f"📤 Google Drive : {job['drive_done'] / 1e6:.1f} / {job['drive_total'] / 1e6:.1f} Mo"
+            )
+        
+        if index_active and job["total"]:
+            progress_bar.progress(min(job["done"] / job["total"], 1.0), text=job_progress_text(job))
+        elif not index_active and not indexed_reported:
+            if job["status"] == STATUS_DONE:
+                progress_bar.progress(1.0, text=job_progress_text(job))
+            if on_indexed:
+                on_indexed(job)
+            indexed_reported = True
+        
+        if not index_active and not drive_active:
+            break
+        time.sleep(0.5)
+    
+    if job["drive_status"] == STATUS_DONE:
+        st.success(f"✅ Fichier sauvegardé sur Google Drive ({job['drive_message']})")
+    elif job["drive_status"] in RETRYABLE_STATUSES:
+        st.error(f"❌ {job['drive_message']}")
+    return job
+
 # =============================================================================
 # NAVIGATION BARRE LATÉRALE
 # =============================================================================
@@ -785,32 +2191,59 @@ def render_credentials_section(collection):
     
     st.markdown(f"Gérez les identifiants d'authentification pour les utilisateurs accédant à **{CHATBOT_NAME}**")
     
+    # Une seule lecture par rendu, partagée par les onglets (recherche côté serveur)
+    search_prefix = st.text_input(
+        "🔎 Rechercher un utilisateur",
+        placeholder="Début du nom d'utilisateur",
+        key="user_search_prefix"
+    ).strip()
+    try:
+        matching_users = count_users(collection, search_prefix)
+    except PyMongoError as e:
+        st.error(f"❌ Échec du comptage des utilisateurs : {str(e)}")
+        matching_users = 0
+    users = get_all_users(collection, search_prefix, limit=USERS_SELECT_LIMIT)
+    usernames = [user["username"] for user in users]
+    if matching_users > len(users):
+        st.caption(
+            f"{len(users)} premiers utilisateurs sur {matching_users:,} — affinez la recherche pour les autres"
+        )
+    
     # Sous-onglets pour les opérations sur les identifiants
-    cred_tab1, cred_tab2, cred_tab3, cred_tab4 = st.tabs([
-        "📋 Voir Utilisateurs", "➕ Ajouter", "✏️ Modifier", "🗑️ Supprimer"
+    cred_tab1, cred_tab2, cred_tab3, cred_tab4, cred_tab5 = st.tabs([
+        "📋 Voir Utilisateurs", "➕ Ajouter", "✏️ Modifier", "🗑️ Supprimer", "📥 Import CSV"
     ])
     
     # ===== VOIR UTILISATEURS =====
     with cred_tab1:
         st.subheader("Utilisateurs Enregistrés")
-        users = get_all_users(collection)
         
-        if users:
-            st.write(f"**Total Utilisateurs : {len(users)}**")
-            st.markdown("---")
+        if matching_users:
+            st.write(f"**Total Utilisateurs : {matching_users:,}**")
             
-            for idx, user in enumerate(users, 1):
-                username = user.get("username", "N/A")
-                password = user.get("password_plain") or user.get("password", "N/A")
-                
-                col1, col2 = st.columns([1, 2])
-                with col1:
-                    st.markdown(f"**{idx}. Nom d'utilisateur :**")
-                    st.code(username)
-                with col2:
-                    st.markdown(f"**Mot de passe :**")
-                    st.code(password)
-                st.divider()
+            col1, col2 = st.columns(2)
+            with col1:
+                page_size = st.selectbox("Utilisateurs par page", [25, 50, 100, 250], index=1, key="users_page_size")
+            page_count = max(math.ceil(matching_users / page_size), 1)
+            with col2:
+                page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="users_page")
+            
+            # Une page lue côté serveur (skip/limit sur l'index `username`), affichée en un seul tableau
+            page_users = get_all_users(collection, search_prefix, skip=(page - 1) * page_size, limit=page_size)
+            first_row = (page - 1) * page_size + 1
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "Nom d'utilisateur": user.get("username", "N/A"),
+                        "Mot de passe": user.get("password_plain") or user.get("password", "N/A")
+                    }
+                    for user in page_users
+                ], index=range(first_row, first_row + len(page_users))),
+                use_container_width=True
+            )
+            st.caption(f"Page {page} / {page_count}")
+        elif search_prefix:
+            st.info(f"📭 Aucun utilisateur ne commence par '{search_prefix}'.")
         else:
             st.info("📭 Aucun utilisateur trouvé. Ajoutez un utilisateur dans l'onglet 'Ajouter'.")
     
@@ -851,11 +2284,7 @@ def render_credentials_section(collection):
     with cred_tab3:
         st.subheader("Modifier un Utilisateur Existant")
         
-        users = get_all_users(collection)
-        
         if users:
-            usernames = [user["username"] for user in users]
-            
             with st.form("edit_user_form"):
                 col1, col2 = st.columns(2)
                 
@@ -906,10 +2335,7 @@ def render_credentials_section(collection):
     with cred_tab4:
         st.subheader("Supprimer un Utilisateur")
         
-        users = get_all_users(collection)
-        
         if users:
-            usernames = [user["username"] for user in users]
             st.warning("⚠️ Cette action est permanente et irréversible")
             
             with st.form("delete_user_form"):
@@ -938,6 +2364,33 @@ def render_credentials_section(collection):
                             st.error(f"❌ {message}")
         else:
             st.info("📭 Aucun utilisateur disponible à supprimer")
+    
+    # ===== IMPORT CSV =====
+    with cred_tab5:
+        st.subheader("Importer des Utilisateurs en Masse")
+        st.markdown(
+            "Fichier CSV encodé en UTF-8 avec une ligne d'en-tête `username,password` ; "
+            "chaque ligne est validée comme lors d'un ajout manuel"
+        )
+        
+        users_csv = st.file_uploader("Sélectionner un fichier CSV", type=["csv"], key="users_csv")
+        
+        if users_csv is not None and st.button("📥 Importer", use_container_width=True, type="primary"):
+            with st.spinner("Validation et hachage des mots de passe..."):
+                report, error = import_users_csv(collection, users_csv.getvalue())
+            
+            if error:
+                st.error(f"❌ {error}")
+            elif not report:
+                st.warning("⚠️ Le fichier ne contient aucune ligne")
+            else:
+                created = sum(entry["Statut"] == "✅ Créé" for entry in report)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Créés", created)
+                with col2:
+                    st.metric("Rejetés", len(report) - created)
+                st.dataframe(pd.DataFrame(report), use_container_width=True, hide_index=True)
 
 # =============================================================================
 # SECTION BASE DE CONNAISSANCES
@@ -991,8 +2444,9 @@ def render_knowledge_section():
     # ────────────────────────────────────────────────────────────────────────
     
     # Sous-onglets pour les opérations sur les connaissances
-    kb_tab1, kb_tab2, kb_tab3 = st.tabs([
-        "📤 Ajouter Document", "🗑️ Supprimer Document", "📋 Voir Documents"
+    kb_tab1, kb_tab2, kb_tab3, kb_tab4, kb_tab5, kb_tab6, kb_tab7 = st.tabs([
+        "📤 Ajouter Document", "📦 Import en Masse", "🗑️ Supprimer Document", "📋 Voir Documents",
+        "🔎 Rechercher", "⏱️ Tâches", "⚙️ Collection"
     ])
     
     # ===== AJOUTER DOCUMENT =====
@@ -1003,7 +2457,7 @@ def render_knowledge_section():
         
         uploaded_file = st.file_uploader(
             "Sélectionner un fichier à télécharger",
-            type=["pdf", "txt", "md", "json"],
+            type=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
             help="Formats supportés : PDF, TXT, MD, JSON"
         )
         
@@ -1014,11 +2468,25 @@ def render_knowledge_section():
         
         # Paramètres de chunking
         with st.expander("⚙️ Paramètres Avancés"):
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             with col1:
-                chunk_size = st.number_input("Taille du Chunk", min_value=100, max_value=5000, value=1000)
+                chunk_size = st.number_input(
+                    "Taille du Chunk (tokens)", min_value=16, max_value=512, value=CHUNK_MAX_TOKENS,
+                    help="Plafonnée à la longueur que le modèle d'embedding encode réellement"
+                )
             with col2:
-                overlap = st.number_input("Chevauchement", min_value=0, max_value=500, value=200)
+                overlap = st.number_input(
+                    "Chevauchement (tokens)", min_value=0, max_value=256, value=CHUNK_OVERLAP_TOKENS,
+                    help="Phrases de fin d'un chunk reprises au début du suivant"
+                )
+            with col3:
+                batch_size = st.number_input(
+                    "Taille des Lots (embeddings)",
+                    min_value=1,
+                    max_value=1024,
+                    value=EMBEDDING_BATCH_SIZE,
+                    help="Nombre de chunks encodés en un seul passage du modèle"
+                )
         
         if uploaded_file is not None:
             file_name = uploaded_file.name
@@ -1027,13 +2495,20 @@ def render_knowledge_section():
             
             st.markdown(f"**📁 Fichier :** `{file_name}`")
             
-            # Extraire le texte
-            if file_extension == ".pdf":
-                with st.spinner("Extraction du texte du PDF..."):
-                    content, error = extract_text_from_pdf(uploaded_file)
-            else:
-                with st.spinner("Lecture du fichier texte..."):
-                    content, error = extract_text_from_file(uploaded_file)
+            # Extraire le texte une seule fois par fichier et par session :
+            # les reruns (titre, expanders, paramètres) réutilisent le résultat
+            file_hash = memoize_in_session(
+                "uploaded_file_hashes",
+                (getattr(uploaded_file, "file_id", file_name), uploaded_file.size),
+                lambda: file_sha256(uploaded_file)
+            )
+            spinner_text = "Extraction du texte du PDF..." if file_extension == ".pdf" else "Lecture du fichier texte..."
+            with st.spinner(spinner_text):
+                content, pages, error = memoize_in_session(
+                    "extractions",
+                    file_hash,
+                    lambda: extract_uploaded_file(uploaded_file, file_extension)
+                )
             
             if error:
                 st.error(f"❌ {error}")
@@ -1047,8 +2522,26 @@ def render_knowledge_section():
                         disabled=True
                     )
                 
+                # Temps d'extraction par page (PDF)
+                if pages:
+                    with st.expander("⏱️ Temps d'Extraction par Page", expanded=False):
+                        total_seconds = sum(seconds for _, _, seconds in pages)
+                        st.caption(
+                            f"{len(pages)} pages — {total_seconds:.2f} s cumulées "
+                            f"(moyenne {total_seconds / len(pages) * 1000:.0f} ms/page)"
+                        )
+                        timings_df = pd.DataFrame(
+                            [{"Page": page, "Caractères": len(text), "Temps (ms)": round(seconds * 1000, 1)}
+                             for page, text, seconds in pages]
+                        ).sort_values("Temps (ms)", ascending=False)
+                        st.dataframe(timings_df.head(20), use_container_width=True, hide_index=True)
+                
                 # Créer les chunks
-                chunks = chunk_text(content, chunk_size, overlap)
+                chunks = memoize_in_session(
+                    "chunkings",
+                    (file_hash, chunk_size, overlap),
+                    lambda: chunk_text(content, chunk_size, overlap, pages=pages)
+                )
                 
                 st.success("✅ Texte extrait avec succès !")
                 
@@ -1059,7 +2552,7 @@ def render_knowledge_section():
                 with col2:
                     st.metric("Nombre de Chunks", len(chunks))
                 with col3:
-                    avg_size = sum(len(c) for c in chunks) / len(chunks) if chunks else 0
+                    avg_size = sum(len(c["content"]) for c in chunks) / len(chunks) if chunks else 0
                     st.metric("Taille Moyenne", f"{avg_size:.0f}")
                 
                 st.markdown("---")
@@ -1072,9 +2565,13 @@ def render_knowledge_section():
                     
                     for i, (tab, chunk) in enumerate(zip(tabs, display_chunks)):
                         with tab:
+                            pages_label = (
+                                f"p. {chunk['page']}" if chunk["page"] == chunk["page_end"]
+                                else f"p. {chunk['page']}-{chunk['page_end']}"
+                            )
                             st.text_area(
-                                f"Chunk {i+1} ({len(chunk)} car.)",
-                                chunk,
+                                f"Chunk {i+1} ({len(chunk['content'])} car., {pages_label})",
+                                chunk["content"],
                                 height=150,
                                 key=f"chunk_{i}"
                             )
@@ -1091,80 +2588,126 @@ def render_knowledge_section():
                     "fichier_source": file_name,
                     "collection_qdrant": selected_collection,
                     "total_chunks": len(chunks),
-                    "taille_chunk": chunk_size,
-                    "chevauchement": overlap,
+                    "taille_chunk_tokens": chunk_size,
+                    "chevauchement_tokens": overlap,
+                    "taille_lot_embedding": batch_size,
                     "pret_pour_upload": True
                 })
                 
                 # Bouton d'upload
                 if st.button("🚀 Envoyer à la Base de Connaissances", use_container_width=True, type="primary"):
-                    success_qdrant = False
-                    
-                    # 1. Sauvegarder localement et sur Google Drive
-                    with st.spinner("📤 Sauvegarde sur Google Drive..."):
-                        try:
-                            # Créer le dossier RAG DATA s'il n'existe pas
-                            rag_data_dir = "RAG DATA"
-                            os.makedirs(rag_data_dir, exist_ok=True)
-                            
-                            # Chemin de sauvegarde local
-                            local_file_path = os.path.join(rag_data_dir, file_name)
-                            
-                            # Écrire le fichier
-                            uploaded_file.seek(0)
-                            with open(local_file_path, "wb") as f:
-                                f.write(uploaded_file.read())
-                            
-                            # Authentifier Google Drive
-                            service = push_to_google_drive.authenticate()
-                            
-                            # Charger le mapping existant
-                            mapping_file = push_to_google_drive.DRIVE_MAPPING_FILE
-                            if os.path.exists(mapping_file):
-                                with open(mapping_file, 'r', encoding='utf-8') as f:
-                                    file_mapping = json.load(f)
-                            else:
-                                file_mapping = {}
-
-                            # Upload sur Drive
-                            # On vérifie si un dossier RAG DATA existe déjà sur Drive, sinon on le crée
-                            parent_id = push_to_google_drive.GOOGLE_DRIVE_PARENT_FOLDER_ID
-                            rag_folder_id = push_to_google_drive.find_existing_folder(service, rag_data_dir, parent_id)
-                            
-                            if not rag_folder_id:
-                                rag_folder_id = push_to_google_drive.create_folder(service, rag_data_dir, parent_id)
-                            
-                            # Upload du fichier dans le dossier RAG DATA
-                            file_id = push_to_google_drive.upload_file(service, local_file_path, rag_folder_id, file_mapping)
-                            
-                            if file_id:
-                                # Sauvegarder le mapping mis à jour localement
-                                with open(mapping_file, 'w', encoding='utf-8') as f:
-                                    json.dump(file_mapping, f, indent=2, ensure_ascii=False)
-                                
-                                # Synchroniser avec MongoDB
-                                sync_mapping_to_mongo(file_mapping)
-                                st.success(f"✅ Fichier sauvegardé sur Google Drive (ID: {file_id})")
-                            else:
-                                st.error("❌ Échec de l'upload sur Google Drive")
-
-                        except Exception as e:
-                            st.error(f"❌ Erreur lors de l'upload Drive: {str(e)}")
-                            # On continue quand même vers Qdrant si l'utilisateur le souhaite ou on arrête?
-                            # Pour l'instant on continue, mais on affiche l'erreur.
+                    # Le fichier est sauvegardé localement puis traité en arrière-plan :
+                    # fermer l'onglet n'interrompt pas l'ingestion
+                    local_file_path = save_to_rag_data(file_name, uploaded_file.getvalue())
+                    job_id = enqueue_ingestion_job({
+                        "local_path": local_file_path,
+                        "file_name": file_name,
+                        "title": title,
+                        "collection": selected_collection,
+                        "chunk_size": int(chunk_size),
+                        "overlap": int(overlap),
+                        "chunking": "tokens",
+                        "batch_size": int(batch_size)
+                    })
+                    st.info(f"📥 Tâche #{job_id} ajoutée à la file d'ingestion — suivi également disponible dans l'onglet « ⏱️ Tâches »")
                     
-                    # 2. Indexer dans Qdrant
-                    with st.spinner(f"⏳ Génération des embeddings et upload de {len(chunks)} chunks dans **{selected_collection}**..."):
-                        success_qdrant, message = add_chunks_to_qdrant(chunks, title, file_name, selected_collection)
+                    def show_indexing_result(job):
+                        if job["status"] == STATUS_DONE:
+                            st.success(f"{job['message']} — document cherchable")
+                            st.balloons()
+                        else:
+                            st.error(f"❌ {job['error']}")
                     
-                    if success_qdrant:
-                        st.success(message)
-                        st.balloons()
-                    else:
-                        st.error(f"❌ {message}")
+                    follow_job(job_id, on_indexed=show_indexing_result)
     
-    # ===== SUPPRIMER DOCUMENT =====
+    # ===== IMPORT EN MASSE =====
     with kb_tab2:
+        st.subheader("Importer Plusieurs Documents")
+        
+        st.info(f"📦 Les documents seront indexés dans la collection **{selected_collection}**")
+        st.caption(
+            "Les fichiers sont extraits en parallèle et encodés par lots partagés entre documents. "
+            "Ils ne sont pas envoyés sur Google Drive : utilisez la synchronisation de push_to_google_drive.py."
+        )
+        
+        bulk_source = st.radio(
+            "Source :",
+            ["Fichiers multiples", "Archive ZIP", "Dossier sur le serveur"],
+            horizontal=True
+        )
+        
+        if bulk_source == "Fichiers multiples":
+            bulk_files = st.file_uploader(
+                "Sélectionner les fichiers",
+                type=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
+                accept_multiple_files=True,
+                key="bulk_files"
+            )
+        elif bulk_source == "Archive ZIP":
+            bulk_zip = st.file_uploader("Sélectionner une archive ZIP", type=["zip"], key="bulk_zip")
+        else:
+            bulk_dir = st.text_input(
+                "Chemin du dossier sur le serveur",
+                value=RAG_DATA_DIR,
+                help=f"Parcouru récursivement ; formats : {', '.join(SUPPORTED_EXTENSIONS)}"
+            )
+        
+        with st.expander("⚙️ Paramètres Avancés"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                bulk_chunk_size = st.number_input(
+                    "Taille du Chunk (tokens)", min_value=16, max_value=512, value=CHUNK_MAX_TOKENS, key="bulk_chunk_size"
+                )
+            with col2:
+                bulk_overlap = st.number_input(
+                    "Chevauchement (tokens)", min_value=0, max_value=256, value=CHUNK_OVERLAP_TOKENS, key="bulk_overlap"
+                )
+            with col3:
+                bulk_batch_size = st.number_input(
+                    "Taille des Lots (embeddings)",
+                    min_value=1,
+                    max_value=1024,
+                    value=EMBEDDING_BATCH_SIZE,
+                    key="bulk_batch_size"
+                )
+        
+        if st.button("🚀 Lancer l'Import en Masse", use_container_width=True, type="primary"):
+            file_paths, root_dir = [], RAG_DATA_DIR
+            if bulk_source == "Fichiers multiples" and bulk_files:
+                file_paths = [save_to_rag_data(f.name, f.getvalue()) for f in bulk_files]
+            elif bulk_source == "Archive ZIP" and bulk_zip is not None:
+                file_paths = list_ingestible_files(extract_zip_to_rag_data(bulk_zip.name, bulk_zip.getvalue()))
+            elif bulk_source == "Dossier sur le serveur" and bulk_dir:
+                if os.path.isdir(bulk_dir):
+                    root_dir = bulk_dir
+                    file_paths = list_ingestible_files(bulk_dir)
+                else:
+                    st.error(f"❌ Dossier introuvable : {bulk_dir}")
+            
+            if not file_paths:
+                st.warning("⚠️ Aucun fichier pris en charge à importer")
+            else:
+                job_id = enqueue_ingestion_job({
+                    "paths": file_paths,
+                    "root_dir": root_dir,
+                    "collection": selected_collection,
+                    "chunk_size": int(bulk_chunk_size),
+                    "overlap": int(bulk_overlap),
+                    "chunking": "tokens",
+                    "batch_size": int(bulk_batch_size)
+                }, kind="bulk_ingestion")
+                st.info(f"📥 Tâche #{job_id} : {len(file_paths)} fichiers en file d'ingestion")
+                
+                job = follow_job(job_id)
+                if job["status"] == STATUS_DONE:
+                    st.success(job["message"])
+                else:
+                    st.error(f"❌ {job['error']}")
+                if job["result"]:
+                    st.dataframe(pd.DataFrame(job["result"]), use_container_width=True, hide_index=True)
+    
+    # ===== SUPPRIMER DOCUMENT =====
+    with kb_tab3:
         st.subheader("Supprimer un Document de la Base")
         
         st.warning(f"⚠️ Cette action supprimera le document de la collection **{selected_collection}**")
@@ -1208,11 +2751,14 @@ def render_knowledge_section():
                     st.error(f"❌ {message}")
         
         else:
-            point_id = st.number_input("ID du Point", min_value=0, value=0, step=1)
+            point_id = st.text_input(
+                "ID du Point",
+                placeholder="ex: 3f2b8c1e-... (UUID) ou 42 pour les anciens points"
+            )
             
-            if st.button("🗑️ Supprimer le Point", use_container_width=True):
+            if point_id and st.button("🗑️ Supprimer le Point", use_container_width=True):
                 with st.spinner("Suppression en cours..."):
-                    success, message = remove_from_qdrant("id", str(point_id), selected_collection)
+                    success, message = remove_from_qdrant("id", point_id.strip(), selected_collection)
                 
                 if success:
                     st.success(message)
@@ -1221,19 +2767,33 @@ def render_knowledge_section():
                     st.error(f"❌ {message}")
     
     # ===== VOIR DOCUMENTS =====
-    with kb_tab3:
+    with kb_tab4:
         st.subheader("Documents de la Base de Connaissances")
         st.caption(f"Collection : **{selected_collection}**")
         
-        # Bouton pour rafraîchir
-        if st.button("🔄 Rafraîchir la Liste", use_container_width=False):
-            st.rerun()
+        # Boutons pour rafraîchir et réparer le catalogue
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            if st.button("🔄 Rafraîchir la Liste", use_container_width=False):
+                get_search_filter_choices.clear()
+                st.rerun()
+        with col2:
+            rebuild_catalog = st.button(
+                "🛠️ Reconstruire le Catalogue",
+                use_container_width=False,
+                help="Reparcourt toute la collection Qdrant pour recalculer le catalogue des documents"
+            )
         
         st.markdown("---")
         
-        # Récupérer les documents
-        with st.spinner("Récupération des documents..."):
-            documents, error = list_qdrant_documents(selected_collection)
+        # Récupérer les documents depuis le catalogue
+        if rebuild_catalog:
+            with st.spinner("Reconstruction du catalogue (parcours complet de la collection)..."):
+                documents, error = rebuild_document_catalog(selected_collection)
+            get_search_filter_choices.clear()
+        else:
+            with st.spinner("Récupération des documents..."):
+                documents, error = list_qdrant_documents(selected_collection)
         
         if error:
             st.error(f"❌ Erreur : {error}")
@@ -1271,6 +2831,274 @@ def render_knowledge_section():
         else:
             st.info("📭 Aucun document trouvé dans la base de connaissances. Commencez par ajouter des documents dans l'onglet 'Ajouter Document'.")
 
+    # ===== RECHERCHER =====
+    with kb_tab5:
+        st.subheader("Recherche Sémantique")
+        st.caption(f"Collection : **{selected_collection}**")
+        
+        with st.form("search_form"):
+            search_query = st.text_input("Requête", placeholder="Posez une question comme dans le chatbot")
+            
+            # Choix des filtres mis en cache : sans MongoDB, les lister parcourt toute la collection
+            try:
+                filter_sources, filter_titles = get_search_filter_choices(selected_collection)
+            except RuntimeError as e:
+                filter_sources, filter_titles = [], []
+                st.warning(f"⚠️ Filtres indisponibles : {str(e)}")
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                search_source = st.selectbox("Fichier source", ["Tous"] + filter_sources)
+            with col2:
+                search_title = st.selectbox("Titre du document", ["Tous"] + filter_titles)
+            with col3:
+                top_k = st.number_input("Résultats (top-k)", min_value=1, max_value=SEARCH_MAX_TOP_K, value=5)
+            
+            submitted = st.form_submit_button("🔎 Rechercher", use_container_width=True)
+        
+        if submitted:
+            if not search_query.strip():
+                st.error("❌ Veuillez saisir une requête")
+            else:
+                hits, timings, error = search_qdrant(
+                    selected_collection,
+                    search_query.strip(),
+                    int(top_k),
+                    source_file=None if search_source == "Tous" else search_source,
+                    doc_title=None if search_title == "Tous" else search_title
+                )
+                
+                if error:
+                    st.error(f"❌ Erreur : {error}")
+                else:
+                    # Réservé avant les résultats : le temps d'affichage n'est connu qu'après
+                    timings_placeholder = st.empty()
+                    render_started = time.perf_counter()
+                    
+                    if not hits:
+                        st.info("📭 Aucun résultat")
+                    for rank, hit in enumerate(hits, 1):
+                        payload = hit.payload or {}
+                        page, page_end = payload.get("page"), payload.get("page_end")
+                        pages_label = f"p. {page}" if page_end in (None, page) else f"p. {page}-{page_end}"
+                        with st.expander(
+                            f"#{rank} — {hit.score:.4f} — {payload.get('doc_title', 'N/A')} ({pages_label})",
+                            expanded=rank == 1
+                        ):
+                            st.caption(f"Source : {payload.get('source_file', 'N/A')} — ID : {hit.id}")
+                            st.write(payload.get("content", ""))
+                    
+                    timings["affichage"] = time.perf_counter() - render_started
+                    with timings_placeholder.container():
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Embedding", f"{timings['embedding'] * 1000:.0f} ms")
+                        with col2:
+                            st.metric("Recherche Qdrant", f"{timings['recherche'] * 1000:.0f} ms")
+                        with col3:
+                            st.metric("Affichage", f"{timings['affichage'] * 1000:.0f} ms")
+                        with col4:
+                            st.metric("Total", f"{sum(timings.values()) * 1000:.0f} ms")
+    
+    # ===== TÂCHES D'INGESTION =====
+    with kb_tab6:
+        st.subheader("Tâches d'Ingestion")
+        st.caption("Toutes collections confondues — les tâches continuent même si la page est fermée")
+        
+        if st.button("🔄 Rafraîchir les Tâches", use_container_width=False):
+            st.rerun()
+        
+        store, _ = get_job_runner()
+        jobs = store.list(limit=100)
+        
+        if jobs:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("En cours / en attente", sum(j["status"] in (STATUS_QUEUED, STATUS_RUNNING) for j in jobs))
+            with col2:
+                st.metric("Terminées", sum(j["status"] == STATUS_DONE for j in jobs))
+            with col3:
+                st.metric(
+                    "Échouées / interrompues",
+                    sum(j["status"] in RETRYABLE_STATUSES or j["drive_status"] in RETRYABLE_STATUSES for j in jobs)
+                )
+            
+            for job in jobs:
+                if job["status"] == STATUS_RUNNING and job["total"]:
+                    st.progress(min(job["done"] / job["total"], 1.0), text=job_progress_text(job))
+            
+            jobs_df = pd.DataFrame([
+                {
+                    "ID": job["id"],
+                    "Fichier": job["params"].get("file_name", ""),
+                    "Collection": job["params"].get("collection", ""),
+                    "Statut": JOB_STATUS_LABELS.get(job["status"], job["status"]),
+                    "Étape": job["stage"] or "",
+                    "Type": "Import en masse" if job["kind"] == "bulk_ingestion" else "Document",
+                    "Progression": f"{job['done']:,}/{job['total']:,} {'fichiers' if job['kind'] == 'bulk_ingestion' else 'chunks'}",
+                    "Débit (chunks/s)": round(job["rate"] or 0, 1),
+                    "Drive": JOB_STATUS_LABELS.get(job["drive_status"], "") if job["drive_status"] else "",
+                    "Tentatives": job["attempts"],
+                    "Créée": datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                    "Erreur": job["error"] or ""
+                }
+                for job in jobs
+            ])
+            st.dataframe(jobs_df, use_container_width=True, hide_index=True)
+            
+            reports = [job["id"] for job in jobs if job["result"]]
+            if reports:
+                with st.expander("📊 Rapports d'Import en Masse"):
+                    report_job = st.selectbox("Tâche", reports, format_func=lambda job_id: f"#{job_id}")
+                    report_rows = next(job["result"] for job in jobs if job["id"] == report_job)
+                    st.dataframe(pd.DataFrame(report_rows), use_container_width=True, hide_index=True)
+            
+            retryable = [
+                job["id"] for job in jobs
+                if job["status"] in RETRYABLE_STATUSES or job["drive_status"] in RETRYABLE_STATUSES
+            ]
+            if retryable:
+                st.markdown("---")
+                job_to_retry = st.selectbox("Tâche à relancer", retryable, format_func=lambda job_id: f"#{job_id}")
+                if st.button("🔁 Relancer la Tâche", use_container_width=True):
+                    success, message = retry_ingestion_job(job_to_retry)
+                    if success:
+                        st.success(f"✅ {message}")
+                    else:
+                        st.error(f"❌ {message}")
+        else:
+            st.info("📭 Aucune tâche d'ingestion pour le moment.")
+    
+    # ===== CONFIGURATION DE LA COLLECTION =====
+    with kb_tab7:
+        st.subheader("Stockage de la Collection")
+        st.caption(f"Collection : **{selected_collection}**")
+        
+        client, error = get_qdrant_client()
+        if error:
+            st.error(f"❌ Erreur : {error}")
+        else:
+            try:
+                info = client.get_collection(selected_collection) if client.collection_exists(selected_collection) else None
+            except Exception as e:
+                info = None
+                st.error(f"❌ Erreur : {e}")
+            
+            # Valeurs actuelles (ou par défaut pour une nouvelle collection)
+            current_quantization, current_compression, current_always_ram = "none", "x16", True
+            current_on_disk_vectors = current_on_disk_payload = False
+            current_m, current_ef_construct = HNSW_DEFAULT_M, HNSW_DEFAULT_EF_CONSTRUCT
+            if info is not None:
+                quantization = info.config.quantization_config
+                if isinstance(quantization, ScalarQuantization):
+                    current_quantization = "scalar"
+                    current_always_ram = bool(quantization.scalar.always_ram)
+                elif isinstance(quantization, ProductQuantization):
+                    current_quantization = "product"
+                    current_compression = CompressionRatio(quantization.product.compression).value
+                    current_always_ram = bool(quantization.product.always_ram)
+                elif isinstance(quantization, BinaryQuantization):
+                    current_quantization = "binary"
+                    current_always_ram = bool(quantization.binary.always_ram)
+                current_on_disk_vectors = any(params.on_disk for params in named_vector_params(info).values())
+                current_on_disk_payload = bool(info.config.params.on_disk_payload)
+                current_m, current_ef_construct = info.config.hnsw_config.m, info.config.hnsw_config.ef_construct
+                
+                # Empreinte mémoire d'après get_collection
+                memory_rows = estimate_collection_memory(info)
+                ram_mb = sum(row["Taille estimée (Mo)"] or 0 for row in memory_rows if row["Emplacement"] == "RAM")
+                disk_mb = sum(row["Taille estimée (Mo)"] or 0 for row in memory_rows if row["Emplacement"] != "RAM")
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Points", f"{info.points_count or 0:,}")
+                with col2:
+                    st.metric("Vecteurs indexés", f"{info.indexed_vectors_count or 0:,}")
+                with col3:
+                    st.metric("RAM estimée", f"{ram_mb:,.1f} Mo")
+                with col4:
+                    st.metric("Disque (mmap) estimé", f"{disk_mb:,.1f} Mo")
+                st.dataframe(
+                    pd.DataFrame(memory_rows).round({"Taille estimée (Mo)": 2}),
+                    use_container_width=True,
+                    hide_index=True
+                )
+                st.caption(
+                    f"Statut : {info.status} — segments : {info.segments_count} — "
+                    "estimations hors payload et index de payload"
+                )
+            else:
+                st.info("ℹ️ Cette collection n'existe pas encore sur Qdrant : configurez-la puis créez-la.")
+            
+            # Message de l'envoi précédent, conservé à travers le rerun qui recharge la configuration
+            flash = st.session_state.pop("collection_config_flash", None)
+            if flash:
+                st.success(flash)
+            
+            st.markdown("---")
+            
+            with st.form("collection_config_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    quantization_kind = st.selectbox(
+                        "Quantification",
+                        list(QUANTIZATION_LABELS),
+                        index=list(QUANTIZATION_LABELS).index(current_quantization),
+                        format_func=QUANTIZATION_LABELS.get,
+                        help="Vecteurs compressés utilisés pour la recherche ; les originaux servent au rescoring"
+                    )
+                    pq_compression = st.selectbox(
+                        "Compression PQ",
+                        PQ_COMPRESSION_RATIOS,
+                        index=PQ_COMPRESSION_RATIOS.index(current_compression),
+                        help="Utilisée uniquement avec la quantification produit"
+                    )
+                    always_ram = st.checkbox("Vecteurs quantifiés toujours en RAM", value=current_always_ram)
+                with col2:
+                    # Valeurs actuelles ramenées dans les bornes : number_input lève une erreur sinon
+                    hnsw_m = st.number_input(
+                        "HNSW m", min_value=HNSW_M_RANGE[0], max_value=HNSW_M_RANGE[1],
+                        value=min(max(current_m, HNSW_M_RANGE[0]), HNSW_M_RANGE[1]),
+                        help="Voisins par nœud : plus haut = meilleur rappel, plus de mémoire ; 0 désactive le graphe"
+                    )
+                    hnsw_ef_construct = st.number_input(
+                        "HNSW ef_construct", min_value=HNSW_EF_CONSTRUCT_RANGE[0], max_value=HNSW_EF_CONSTRUCT_RANGE[1],
+                        value=min(max(current_ef_construct, HNSW_EF_CONSTRUCT_RANGE[0]), HNSW_EF_CONSTRUCT_RANGE[1]),
+                        help="Précision de construction de l'index"
+                    )
+                    on_disk_vectors = st.checkbox("Vecteurs originaux sur disque", value=current_on_disk_vectors)
+                    on_disk_payload = st.checkbox("Payload sur disque", value=current_on_disk_payload)
+                
+                submitted = st.form_submit_button(
+                    "💾 Appliquer la Configuration" if info is not None else "➕ Créer la Collection",
+                    use_container_width=True,
+                    type="primary"
+                )
+            
+            if submitted:
+                quantization_config = build_quantization_config(quantization_kind, pq_compression, always_ram)
+                hnsw_config = {"m": int(hnsw_m), "ef_construct": int(hnsw_ef_construct)}
+                try:
+                    if info is None:
+                        model = get_embedding_model()
+                        if model is None:
+                            raise RuntimeError("Erreur lors du chargement du modèle d'embedding")
+                        create_qdrant_collection(
+                            client, selected_collection, model.get_sentence_embedding_dimension(),
+                            hnsw_config, quantization_config, on_disk_vectors, on_disk_payload
+                        )
+                        flash = f"✅ Collection '{selected_collection}' créée"
+                    else:
+                        update_qdrant_collection(
+                            client, selected_collection, hnsw_config, quantization_config,
+                            on_disk_vectors, on_disk_payload
+                        )
+                        flash = "✅ Configuration appliquée — Qdrant réoptimise les segments en arrière-plan"
+                except Exception as e:
+                    st.error(f"❌ Erreur : {e}")
+                else:
+                    st.session_state["collection_config_flash"] = flash
+                    st.rerun()
+
 # =============================================================================
 # APPLICATION PRINCIPALE
 # =============================================================================
@@ -0,0 +1,296 @@
+"""
+Profilage de l'ingestion hors Streamlit : extraction, découpage, embeddings et upsert.
+
+Exécute les fonctions d'ingestion du tableau de bord sur un dossier de fichiers
+et mesure, par étape, le temps réel, le temps CPU du processus principal et la
+mémoire : variation de la mémoire résidente pendant l'étape, mémoire résidente
+des workers du pool d'extraction et, avec --tracemalloc, pic des allocations
+Python remis à zéro à chaque étape. En fin de run, le pool est arrêté pour
+relever le temps CPU et le pic mémoire des workers (RUSAGE_CHILDREN).
+L'upsert vise un Qdrant en mémoire par défaut (--qdrant-url pour un Qdrant
+local, --skip-upsert pour l'ignorer).
+
+Exemples :
+    python profile_ingestion.py "RAG DATA" --output results/profile.json
+    python profile_ingestion.py "RAG DATA" --profile cprofile --profile-output results/ingestion.prof
+    python profile_ingestion.py "RAG DATA" --profile pyinstrument --profile-output results/ingestion.html
+"""
+
+import os
+import json
+import time
+import argparse
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmark_retrieval import peak_rss_mb, git_commit, add_environment_arguments, prepare_environment
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de getrusage
+    resource = None
+
+STAGES = ("extraction", "chunking", "embedding", "upsert")
+PROFILE_COLLECTION = "profile_ingestion"
+
+
+def rss_mb():
+    """Mémoire résidente actuelle du processus (Mo), ou None si indisponible."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        # Sans psutil (Linux) : pages résidentes dans /proc/self/statm
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def workers_rss_mb():
+    """Mémoire résidente cumulée des processus enfants vivants (Mo), ou None sans psutil."""
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def keep_max(entry, key, value):
+    """Conserver la plus grande valeur observée (les valeurs None sont ignorées)."""
+    if value is not None:
+        entry[key] = value if entry[key] is None else max(entry[key], value)
+
+
+def workers_usage():
+    """Temps CPU et pic mémoire des workers terminés (RUSAGE_CHILDREN), None sans `resource`."""
+    if resource is None:
+        return {"cpu_s": None, "peak_rss_mb": None}
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu_s": round(children.ru_utime + children.ru_stime, 3),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+
+
+@contextmanager
+def measure(stats, stage):
+    """Cumuler le temps réel, le temps CPU et la variation de mémoire résidente d'une étape.
+
+    Relève aussi la mémoire des workers en fin d'étape et, si tracemalloc est
+    actif, le pic des allocations Python pendant l'étape seule.
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    rss_before = rss_mb()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        entry = stats[stage]
+        entry["wall_s"] += time.perf_counter() - wall
+        entry["cpu_s"] += time.process_time() - cpu
+        rss_after = rss_mb()
+        if rss_before is not None and rss_after is not None:
+            entry["rss_delta_mb"] += rss_after - rss_before
+        keep_max(entry, "rss_max_mb", rss_after)
+        keep_max(entry, "workers_rss_mb", workers_rss_mb())
+        if tracemalloc.is_tracing():
+            keep_max(entry, "python_peak_mb", tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+
+
+def extract(dashboard, path):
+    """Extraire un fichier avec les fonctions du tableau de bord. Retourne (contenu, pages, erreur)."""
+    if Path(path).suffix.lower() == ".pdf":
+        # Pages conservées pour le découpage (positions et numéros de page)
+        return dashboard.extract_uploaded_file(path, ".pdf")
+    with open(path, "rb") as f:
+        content, error = dashboard.extract_text_from_file(f)
+    return content, None, error
+
+
+def profile_ingestion(dashboard, client, args):
+    """Ingérer les fichiers étape par étape et retourner les mesures."""
+    stats = {
+        stage: {"wall_s": 0.0, "cpu_s": 0.0, "rss_delta_mb": 0.0, "rss_max_mb": None,
+                "workers_rss_mb": None, "python_peak_mb": None}
+        for stage in STAGES
+    }
+    totals = {"files": 0, "failed": [], "pages": 0, "characters": 0, "chunks": 0}
+
+    model = dashboard.get_embedding_model(args.model)
+    if model is None:
+        raise RuntimeError(f"Impossible de charger le modèle {args.model}")
+
+    for path in dashboard.list_ingestible_files(args.directory):
+        source_file = Path(os.path.relpath(path, args.directory)).as_posix()
+        totals["files"] += 1
+
+        with measure(stats, "extraction"):
+            content, pages, error = extract(dashboard, path)
+        if error or not content:
+            totals["failed"].append({"file": source_file, "error": error or "Aucun texte extrait"})
+            continue
+        totals["pages"] += len(pages) if pages else 1
+        totals["characters"] += len(content)
+
+        with measure(stats, "chunking"):
+            chunks = dashboard.chunk_text(content, args.chunk_size, args.overlap, args.chunking, pages, args.model)
+        totals["chunks"] += len(chunks)
+
+        for batch_start, batch in zip(range(0, len(chunks), args.batch_size),
+                                      dashboard.iter_batches(chunks, args.batch_size)):
+            with measure(stats, "embedding"):
+                embeddings = dashboard.encode_with_cache(
+                    model, [chunk["content"] for chunk in batch], args.batch_size, args.model
+                )
+            if client is None:
+                continue
+            with measure(stats, "upsert"):
+                points = [
+                    dashboard.build_point(PROFILE_COLLECTION, Path(path).stem, source_file, chunk_id, chunk, embedding)
+                    for chunk_id, chunk, embedding in zip(range(batch_start, batch_start + len(batch)), batch, embeddings)
+                ]
+                dashboard.upsert_with_retry(client, PROFILE_COLLECTION, points)
+
+    for entry in stats.values():
+        for key, value in entry.items():
+            if value is not None:
+                entry[key] = round(value, 3 if key.endswith("_s") else 1)
+    return stats, totals
+
+
+def print_summary(stats, totals, workers):
+    """Afficher le tableau des mesures par étape."""
+    print(f"\n📊 {totals['files']} fichiers, {totals['pages']} pages, {totals['chunks']:,} chunks "
+          f"({len(totals['failed'])} en échec)")
+    print(f"{'Étape':<12}{'Réel (s)':>10}{'CPU (s)':>10}{'ΔRSS (Mo)':>12}{'RSS max (Mo)':>14}"
+          f"{'Workers (Mo)':>14}{'Pic Python (Mo)':>17}")
+    for stage, entry in stats.items():
+        cells = [
+            entry[key] if entry[key] is not None else "-"
+            for key in ("rss_max_mb", "workers_rss_mb", "python_peak_mb")
+        ]
+        print(f"{stage:<12}{entry['wall_s']:>10.3f}{entry['cpu_s']:>10.3f}{entry['rss_delta_mb']:>12}"
+              f"{cells[0]:>14}{cells[1]:>14}{cells[2]:>17}")
+    if workers["cpu_s"] is not None:
+        print(f"Workers (cumul du run) : CPU {workers['cpu_s']} s, pic RSS {workers['peak_rss_mb']} Mo")
+    for failure in totals["failed"]:
+        print(f"  ❌ {failure['file']} : {failure['error']}")
+
+
+def run(args):
+    """Préparer l'environnement, exécuter le profilage et retourner le rapport."""
+    # Caches vides (sauf --warm-cache) : chaque étape fait le vrai travail
+    dashboard, client, _ = prepare_environment(
+        args, None if args.skip_upsert else PROFILE_COLLECTION, "profile_cache_"
+    )
+
+    profiler = None
+    if args.profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif args.profile == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise SystemExit("pyinstrument n'est pas installé : pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    stats, totals = profile_ingestion(dashboard, client, args)
+    elapsed = time.perf_counter() - started
+    if args.tracemalloc:
+        tracemalloc.stop()
+    
+    # Workers arrêtés pour que RUSAGE_CHILDREN inclue leur temps CPU et leur pic mémoire
+    dashboard.get_process_pool().shutdown(wait=True)
+    workers = workers_usage()
+
+    if args.profile == "cprofile":
+        profiler.disable()
+        if args.profile_output:
+            profiler.dump_stats(args.profile_output)
+            print(f"💾 Profil cProfile enregistré dans '{args.profile_output}' (snakeviz, pstats)")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    elif args.profile == "pyinstrument":
+        profiler.stop()
+        if args.profile_output:
+            with open(args.profile_output, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(f"💾 Profil pyinstrument enregistré dans '{args.profile_output}'")
+        else:
+            print(profiler.output_text(unicode=True))
+
+    print_summary(stats, totals, workers)
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "directory": args.directory,
+            "model": args.model,
+            "chunking": args.chunking,
+            "chunk_size": args.chunk_size,
+            "overlap": args.overlap,
+            "batch_size": args.batch_size,
+            "upsert": "ignoré" if args.skip_upsert else args.qdrant_url,
+            "warm_cache": args.warm_cache,
+            "profile": args.profile,
+            "tracemalloc": args.tracemalloc
+        },
+        "totals": totals,
+        "stages": stats,
+        "total_wall_s": round(elapsed, 3),
+        "chunks_per_s": round(totals["chunks"] / elapsed, 1) if elapsed else None,
+        "workers": workers,
+        # Pic depuis le démarrage du processus (modèle compris), pas attribuable à une étape
+        "process_peak_rss_mb": peak_rss_mb()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profiler l'ingestion du tableau de bord sur un dossier de fichiers.")
+    parser.add_argument('directory', help='Dossier des fichiers à ingérer (parcouru récursivement)')
+    parser.add_argument('--model', default=None, help='Modèle d\'embedding (défaut : celui du tableau de bord)')
+    parser.add_argument('--chunking', choices=('tokens', 'chars'), default='tokens')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Tokens (ou caractères avec --chunking chars)')
+    parser.add_argument('--overlap', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=64)
+    add_environment_arguments(parser)
+    parser.add_argument('--skip-upsert', action='store_true', help='Mesurer sans envoyer les points')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Mesurer le pic des allocations Python par étape (ralentit le run)')
+    parser.add_argument('--profile', choices=('cprofile', 'pyinstrument'), default=None)
+    parser.add_argument('--profile-output', default=None,
+                        help='Fichier du profil (.prof pour cProfile, .html pour pyinstrument)')
+    parser.add_argument('--output', default=None, help='Chemin du rapport JSON')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Dossier introuvable : {args.directory}")
+
+    report = run(args)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapport enregistré dans '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import os
 import pickle
+import hashlib
 import mimetypes
 import json
+import random
+import threading
+import time
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
@@ -9,11 +16,24 @@ from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from google.auth.transport.requests import Request
 
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    # Windows
+    import msvcrt
+    fcntl = None
+
 # Full access scope for uploading files
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
 # Mapping file to store local path -> Google Drive file ID
 DRIVE_MAPPING_FILE = 'drive_file_mapping.json'
+# Single-file updates are appended here and folded into the JSON file past this size
+DRIVE_MAPPING_LOG = f'{DRIVE_MAPPING_FILE}.log'
+MAPPING_LOG_COMPACT_BYTES = 1024 * 1024
+# Held while the mapping file or its log is written (dashboard and CLI may run at once)
+DRIVE_MAPPING_LOCK = f'{DRIVE_MAPPING_FILE}.lock'
 
 # Local folder to upload
 RAG_DATA_FOLDER = 'RAG DATA'
@@ -21,9 +41,38 @@ RAG_DATA_FOLDER = 'RAG DATA'
 # Optional: Set a parent folder ID in Google Drive (leave None to upload to root)
 GOOGLE_DRIVE_PARENT_FOLDER_ID = None
 
+# Maximum number of concurrent Drive requests (lowered automatically on rate limits)
+MAX_CONCURRENT_UPLOADS = int(os.getenv('DRIVE_MAX_CONCURRENCY', '8'))
 
-def authenticate():
-    """Authenticate with Google Drive API and return service object."""
+# Resumable upload chunk size (Drive requires a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = int(os.getenv('DRIVE_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+
+# Resumable session URIs of in-progress uploads, so a crashed upload can continue
+UPLOAD_SESSIONS_FILE = '.drive_upload_sessions.json'
+_sessions_lock = threading.Lock()
+
+# Retries for rate-limited requests (403 rateLimitExceeded / 429)
+MAX_RATE_LIMIT_RETRIES = 6
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# One Drive service per worker thread: httplib2 connections are not thread-safe
+_thread_local = threading.local()
+
+# Drive batch endpoint limit (requests per batch)
+BATCH_SIZE = 100
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Serializes writes of the local mapping file across threads (the file lock covers processes)
+_mapping_lock = threading.Lock()
+
+# In-process cache: (parent folder ID, folder name) -> Drive folder ID
+_folder_id_cache = {}
+_folder_cache_lock = threading.Lock()
+
+
+def load_credentials():
+    """Load (or obtain) Google Drive OAuth credentials."""
     creds = None
     token_file = 'token_upload.pickle'
     
@@ -41,24 +90,274 @@ def authenticate():
         with open(token_file, 'wb') as token:
             pickle.dump(creds, token)
     
-    service = build('drive', 'v3', credentials=creds)
+    return creds
+
+
+def authenticate():
+    """Authenticate with Google Drive API and return service object."""
+    service = build('drive', 'v3', credentials=load_credentials())
+    return service
+
+
+def get_thread_service(creds):
+    """Return the Drive service of the current thread, building it on first use."""
+    service = getattr(_thread_local, 'service', None)
+    if service is None or getattr(_thread_local, 'creds', None) is not creds:
+        service = build('drive', 'v3', credentials=creds, cache_discovery=False)
+        _thread_local.service = service
+        _thread_local.creds = creds
     return service
 
 
-def create_folder(service, folder_name, parent_id=None):
+class ConcurrencyLimiter:
+    """Cap concurrent Drive requests; halve the cap on rate limits and recover gradually."""
+    
+    # Successful requests needed before raising the cap by one again
+    RECOVERY_STEP = 20
+    
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self._active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+    
+    def __enter__(self):
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+        return False
+    
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.RECOVERY_STEP and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+    
+    def on_rate_limit(self):
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+
+def is_rate_limit_error(error):
+    """Tell whether an HttpError is a Drive rate-limit response (429, or 403 with a rate-limit reason)."""
+    status = getattr(error.resp, 'status', None)
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    try:
+        details = json.loads(error.content.decode('utf-8'))
+        reasons = {item.get('reason') for item in details.get('error', {}).get('errors', [])}
+    except (ValueError, AttributeError):
+        return False
+    return bool(reasons & RATE_LIMIT_REASONS)
+
+
+def execute_with_backoff(request, limiter=None):
+    """Execute a Drive request, backing off exponentially (with jitter) on rate limits."""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        try:
+            if limiter is None:
+                return request.execute()
+            with limiter:
+                result = request.execute()
+            limiter.on_success()
+            return result
+        except HttpError as error:
+            if not is_rate_limit_error(error) or attempt == MAX_RATE_LIMIT_RETRIES - 1:
+                raise
+            if limiter is not None:
+                limiter.on_rate_limit()
+            time.sleep(min(2 ** attempt + random.random(), 64))
+
+
+def execute_batch(service, requests, limiter=None):
+    """Run Drive requests through the batch endpoint, 100 per HTTP call.
+    
+    `requests` maps a key to an HttpRequest. Returns {key: (response, error)};
+    rate-limited sub-requests are retried in a later batch with backoff.
+    """
+    results = {}
+    pending = dict(requests)
+    
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        if not pending:
+            break
+        keys = list(pending)
+        rate_limited = {}
+        
+        for start in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[start:start + BATCH_SIZE]
+            
+            def callback(request_id, response, exception, chunk=chunk):
+                key = chunk[int(request_id)]
+                if isinstance(exception, HttpError) and is_rate_limit_error(exception):
+                    rate_limited[key] = pending[key]
+                else:
+                    results[key] = (response, exception)
+            
+            batch = service.new_batch_http_request(callback=callback)
+            for index, key in enumerate(chunk):
+                batch.add(pending[key], request_id=str(index))
+            execute_with_backoff(batch, limiter)
+        
+        pending = rate_limited
+        if pending:
+            if limiter is not None:
+                limiter.on_rate_limit()
+            time.sleep(min(2 ** attempt + random.random(), 64))
+    
+    for key in pending:
+        results[key] = (None, RuntimeError("Rate limit retries exhausted"))
+    return results
+
+
+def escape_query_value(value):
+    """Escape a value for use inside a quoted Drive query string."""
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def folder_query(folder_name, parent_id=None):
+    """Build the Drive query matching a non-trashed folder by name (and parent)."""
+    query = f"name='{escape_query_value(folder_name)}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+    if parent_id:
+        query += f" and '{parent_id}' in parents"
+    return query
+
+
+def cache_folder_id(folder_name, parent_id, folder_id):
+    """Remember a folder ID for later lookups in this process."""
+    if folder_id:
+        with _folder_cache_lock:
+            _folder_id_cache[(parent_id, folder_name)] = folder_id
+
+
+def clear_folder_cache():
+    """Forget cached folder IDs (e.g. after a folder was deleted on Drive)."""
+    with _folder_cache_lock:
+        _folder_id_cache.clear()
+
+
+def find_existing_folders(service, folder_names, parent_id=None, limiter=None):
+    """Look up several folders under the same parent in one batch call.
+    
+    Returns {folder_name: folder_id or None}; cached folders are not queried.
+    """
+    found = {}
+    requests = {}
+    for name in set(folder_names):
+        with _folder_cache_lock:
+            cached = _folder_id_cache.get((parent_id, name))
+        if cached:
+            found[name] = cached
+        else:
+            requests[name] = service.files().list(
+                q=folder_query(name, parent_id),
+                spaces='drive',
+                fields='files(id, name)'
+            )
+    
+    for name, (response, error) in execute_batch(service, requests, limiter).items():
+        if error:
+            print(f"Error checking for existing folder {name}: {error}")
+            found[name] = None
+            continue
+        files = response.get('files', [])
+        found[name] = files[0].get('id') if files else None
+        cache_folder_id(name, parent_id, found[name])
+    
+    return found
+
+
+def create_folders(service, folders, limiter=None):
+    """Create several folders in one batch call.
+    
+    `folders` is a list of (folder_name, parent_id). Returns {(name, parent_id): folder_id or None}.
+    """
+    requests = {}
+    for name, parent_id in folders:
+        body = {'name': name, 'mimeType': FOLDER_MIME_TYPE}
+        if parent_id:
+            body['parents'] = [parent_id]
+        requests[(name, parent_id)] = service.files().create(body=body, fields='id, name')
+    
+    created = {}
+    for (name, parent_id), (response, error) in execute_batch(service, requests, limiter).items():
+        if error:
+            print(f"❌ Error creating folder {name}: {error}")
+            created[(name, parent_id)] = None
+            continue
+        created[(name, parent_id)] = response.get('id')
+        cache_folder_id(name, parent_id, response.get('id'))
+        print(f"📁 Created folder: {name} (ID: {response.get('id')})")
+    return created
+
+
+def get_files_metadata(service, file_ids, fields='id, name, md5Checksum, webViewLink, trashed, permissions(id, type, role)',
+                       limiter=None):
+    """Fetch metadata (checksum, link, permissions) of several files in one batch call.
+    
+    Returns {file_id: metadata dict, or None if the file is missing}.
+    """
+    requests = {
+        file_id: service.files().get(fileId=file_id, fields=fields)
+        for file_id in set(file_ids)
+    }
+    metadata = {}
+    for file_id, (response, error) in execute_batch(service, requests, limiter).items():
+        if error:
+            if not (isinstance(error, HttpError) and getattr(error.resp, 'status', None) == 404):
+                print(f"Error fetching metadata for {file_id}: {error}")
+            metadata[file_id] = None
+        else:
+            metadata[file_id] = response
+    return metadata
+
+
+def resolve_folder_path(service, path_parts, parent_id=None, create=True, limiter=None):
+    """Return the ID of a nested folder path (e.g. ['RAG DATA', 'AI Prompt']).
+    
+    Each segment is looked up in the in-process cache first, so repeat calls
+    make no Drive request. Missing segments are created when `create` is True.
+    """
+    for name in path_parts:
+        folder_id = find_existing_folders(service, [name], parent_id, limiter)[name]
+        if not folder_id:
+            if not create:
+                return None
+            folder_id = create_folder(service, name, parent_id, limiter)
+            if not folder_id:
+                return None
+        parent_id = folder_id
+    return parent_id
+
+
+def create_folder(service, folder_name, parent_id=None, limiter=None):
     """Create a folder in Google Drive and return its ID."""
     file_metadata = {
         'name': folder_name,
-        'mimeType': 'application/vnd.google-apps.folder'
+        'mimeType': FOLDER_MIME_TYPE
     }
     if parent_id:
         file_metadata['parents'] = [parent_id]
     
     try:
-        folder = service.files().create(
-            body=file_metadata,
-            fields='id, name'
-        ).execute()
+        folder = execute_with_backoff(
+            service.files().create(body=file_metadata, fields='id, name'),
+            limiter
+        )
+        cache_folder_id(folder_name, parent_id, folder.get('id'))
         print(f"📁 Created folder: {folder_name} (ID: {folder.get('id')})")
         return folder.get('id')
     except HttpError as error:
@@ -66,8 +365,260 @@ def create_folder(service, folder_name, parent_id=None):
         return None
 
 
-def upload_file(service, file_path, parent_id=None, file_mapping=None):
-    """Upload a single file to Google Drive."""
+def file_md5(file_path, block_size=1024 * 1024):
+    """Compute the MD5 of a local file (comparable to Drive's md5Checksum)."""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mapping_key(file_path):
+    """Return the mapping key of a local file (path relative to the RAG DATA folder)."""
+    return os.path.relpath(file_path, RAG_DATA_FOLDER)
+
+
+def normalize_mapping_key(key):
+    """Normalize a mapping key so Windows and POSIX separators compare equal."""
+    return key.replace('\\', '/')
+
+
+def record_mapping_entry(file_mapping, file_path, file_id, md5=None, key=None):
+    """Store the Drive ID and change-detection metadata of a local file in the mapping."""
+    stat = os.stat(file_path)
+    file_mapping[key or mapping_key(file_path)] = {
+        'file_id': file_id,
+        'drive_link': f'https://drive.google.com/file/d/{file_id}/view',
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'md5': md5
+    }
+
+
+@contextmanager
+def mapping_file_lock():
+    """Serialize mapping writes across threads and processes."""
+    with _mapping_lock, open(DRIVE_MAPPING_LOCK, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_mapping_log(offset=0):
+    """Replay the append log from a byte offset. Returns (entries, offset of the end of the log)."""
+    entries = {}
+    if not os.path.exists(DRIVE_MAPPING_LOG):
+        return entries, 0
+    with open(DRIVE_MAPPING_LOG, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                entries.update(json.loads(line))
+            except json.JSONDecodeError:
+                # Last line cut short by a crash mid-write
+                continue
+        return entries, f.tell()
+
+
+def _load_mapping_snapshot():
+    file_mapping = {}
+    if os.path.exists(DRIVE_MAPPING_FILE):
+        with open(DRIVE_MAPPING_FILE, 'r', encoding='utf-8') as f:
+            file_mapping = json.load(f)
+    entries, log_offset = read_mapping_log()
+    file_mapping.update(entries)
+    return file_mapping, log_offset
+
+
+def load_mapping_snapshot():
+    """Load the mapping and the log offset it includes, to pass back to save_mapping."""
+    with mapping_file_lock():
+        return _load_mapping_snapshot()
+
+
+def load_mapping():
+    """Load the local Drive file mapping (empty if missing), replaying the append log."""
+    return load_mapping_snapshot()[0]
+
+
+def mapping_log_offset():
+    """Current end of the append log: entries appended later are kept by save_mapping."""
+    with mapping_file_lock():
+        return os.path.getsize(DRIVE_MAPPING_LOG) if os.path.exists(DRIVE_MAPPING_LOG) else 0
+
+
+def _write_mapping(file_mapping):
+    tmp_file = f"{DRIVE_MAPPING_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(file_mapping, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, DRIVE_MAPPING_FILE)
+    if os.path.exists(DRIVE_MAPPING_LOG):
+        os.remove(DRIVE_MAPPING_LOG)
+
+
+def save_mapping(file_mapping, log_offset):
+    """Write the whole Drive file mapping atomically, in place of the JSON file and its log.
+    
+    `file_mapping` already includes the log up to `log_offset` (from
+    load_mapping_snapshot or mapping_log_offset); entries appended after it,
+    e.g. by the dashboard during a sync, are merged in before the log is dropped.
+    """
+    with mapping_file_lock():
+        entries, _ = read_mapping_log(log_offset)
+        file_mapping.update(entries)
+        _write_mapping(file_mapping)
+
+
+def append_mapping_entries(entries):
+    """Record changed mapping entries without rewriting the whole mapping file.
+    
+    Each entry is appended to the log as one JSON line; once the log grows
+    past MAPPING_LOG_COMPACT_BYTES it is compacted into the JSON file.
+    """
+    with mapping_file_lock():
+        with open(DRIVE_MAPPING_LOG, 'a', encoding='utf-8') as f:
+            for key, entry in entries.items():
+                f.write(json.dumps({key: entry}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.getsize(DRIVE_MAPPING_LOG) > MAPPING_LOG_COMPACT_BYTES:
+            _write_mapping(_load_mapping_snapshot()[0])
+
+
+def upload_session_key(action, file_path, target_id):
+    """Identify an upload by file content version and destination (parent or file ID)."""
+    stat = os.stat(file_path)
+    return f"{action}|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime}|{target_id}"
+
+
+def load_upload_sessions():
+    """Load persisted resumable session URIs."""
+    if not os.path.exists(UPLOAD_SESSIONS_FILE):
+        return {}
+    try:
+        with open(UPLOAD_SESSIONS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def store_upload_session(session_key, session_uri):
+    """Persist (or forget, with None) the resumable session URI of an upload."""
+    with _sessions_lock:
+        sessions = load_upload_sessions()
+        if session_uri:
+            sessions[session_key] = session_uri
+        else:
+            sessions.pop(session_key, None)
+        tmp_file = f"{UPLOAD_SESSIONS_FILE}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(sessions, f, indent=2)
+        os.replace(tmp_file, UPLOAD_SESSIONS_FILE)
+
+
+def query_upload_session(request, upload_uri, total_size):
+    """Ask Drive how many bytes of a resumable upload session it already holds.
+    
+    Sends the empty PUT with `Content-Range: bytes */size` defined by the
+    resumable upload protocol. Returns (bytes_received, response): response is
+    the finished upload if the server already has every byte, and
+    bytes_received is None if the session has expired.
+    """
+    resp, content = request.http.request(
+        upload_uri, method='PUT',
+        headers={'Content-Length': '0', 'Content-Range': f'bytes */{total_size}'}
+    )
+    if resp.status in (200, 201):
+        return total_size, request.postproc(resp, content)
+    if resp.status == 308:
+        # Range: bytes=0-<last byte received>, absent if nothing was received
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+    if resp.status in (404, 410):
+        return None, None
+    raise HttpError(resp, content, uri=upload_uri)
+
+
+def run_resumable_upload(request, session_key, total_size, progress_callback=None, limiter=None):
+    """Send a resumable upload chunk by chunk, resuming a persisted session if there is one.
+    
+    `progress_callback(bytes_sent, total_bytes)` is called after each chunk.
+    """
+    with _sessions_lock:
+        saved_uri = load_upload_sessions().get(session_key)
+    
+    response = None
+    if saved_uri:
+        if limiter is None:
+            received, response = query_upload_session(request, saved_uri, total_size)
+        else:
+            with limiter:
+                received, response = query_upload_session(request, saved_uri, total_size)
+        if received is None:
+            # Expired session (Drive keeps them about a week): start over
+            print("  ⚠️ Upload session expired, restarting from the beginning")
+            store_upload_session(session_key, None)
+            saved_uri = None
+        else:
+            request.resumable_uri = saved_uri
+            request.resumable_progress = received
+    
+    attempt = 0
+    while response is None:
+        try:
+            if limiter is None:
+                status, response = request.next_chunk(num_retries=3)
+            else:
+                with limiter:
+                    status, response = request.next_chunk(num_retries=3)
+                limiter.on_success()
+        except HttpError as error:
+            http_status = getattr(getattr(error, 'resp', None), 'status', None)
+            if http_status in (404, 410):
+                # Session expired mid-upload: forget it so the next attempt starts over
+                store_upload_session(session_key, None)
+                raise
+            if not is_rate_limit_error(error) or attempt == MAX_RATE_LIMIT_RETRIES - 1:
+                raise
+            if limiter is not None:
+                limiter.on_rate_limit()
+            time.sleep(min(2 ** attempt + random.random(), 64))
+            attempt += 1
+            # next_chunk() asks the server for its offset before resending after an error
+            continue
+        
+        if request.resumable_uri and request.resumable_uri != saved_uri:
+            saved_uri = request.resumable_uri
+            store_upload_session(session_key, saved_uri)
+        if status and progress_callback:
+            progress_callback(status.resumable_progress, total_size)
+    
+    store_upload_session(session_key, None)
+    if progress_callback:
+        progress_callback(total_size, total_size)
+    return response
+
+
+def upload_file(service, file_path, parent_id=None, file_mapping=None, limiter=None,
+                chunk_size=None, progress_callback=None):
+    """Upload a single file to Google Drive in resumable chunks."""
     file_name = os.path.basename(file_path)
     
     # Detect MIME type
@@ -83,25 +634,23 @@ def upload_file(service, file_path, parent_id=None, file_mapping=None):
         media = MediaFileUpload(
             file_path,
             mimetype=mime_type,
+            chunksize=chunk_size or UPLOAD_CHUNK_SIZE,
             resumable=True
         )
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id, name'
-        ).execute()
+        file = run_resumable_upload(
+            service.files().create(body=file_metadata, media_body=media, fields='id, name, md5Checksum'),
+            upload_session_key('create', file_path, parent_id),
+            media.size(),
+            progress_callback,
+            limiter
+        )
         print(f"  ✅ Uploaded: {file_name}")
         
         file_id = file.get('id')
         
         # Store mapping if provided
         if file_mapping is not None and file_id:
-            # Create relative path from RAG DATA folder
-            rel_path = os.path.relpath(file_path, RAG_DATA_FOLDER)
-            file_mapping[rel_path] = {
-                'file_id': file_id,
-                'drive_link': f'https://drive.google.com/file/d/{file_id}/view'
-            }
+            record_mapping_entry(file_mapping, file_path, file_id, file.get('md5Checksum'))
         
         return file_id
     except HttpError as error:
@@ -109,40 +658,108 @@ def upload_file(service, file_path, parent_id=None, file_mapping=None):
         return None
 
 
-def upload_folder_recursive(service, local_folder_path, parent_id=None, file_mapping=None):
-    """Recursively upload a folder and its contents to Google Drive."""
-    folder_name = os.path.basename(local_folder_path)
+class DriveFileMissing(Exception):
+    """The Drive file recorded in the mapping no longer exists (deleted on Drive)."""
+
+
+def update_file(service, file_id, file_path, file_mapping=None, key=None, limiter=None,
+                chunk_size=None, progress_callback=None):
+    """Replace the content of an existing Drive file in place (same ID and link).
+    
+    Raises DriveFileMissing if the file was deleted on Drive, so the caller can
+    drop its mapping entry and upload it as a new file.
+    """
+    file_name = os.path.basename(file_path)
+    mime_type, _ = mimetypes.guess_type(file_path)
+    
+    try:
+        media = MediaFileUpload(
+            file_path,
+            mimetype=mime_type or 'application/octet-stream',
+            chunksize=chunk_size or UPLOAD_CHUNK_SIZE,
+            resumable=True
+        )
+        file = run_resumable_upload(
+            service.files().update(fileId=file_id, media_body=media, fields='id, md5Checksum'),
+            upload_session_key('update', file_path, file_id),
+            media.size(),
+            progress_callback,
+            limiter
+        )
+        print(f"  🔄 Updated: {file_name}")
+        
+        if file_mapping is not None:
+            record_mapping_entry(file_mapping, file_path, file_id, file.get('md5Checksum'), key)
+        
+        return file_id
+    except HttpError as error:
+        if getattr(error.resp, 'status', None) == 404:
+            raise DriveFileMissing(file_id) from error
+        print(f"  ❌ Error updating {file_name}: {error}")
+        return None
+
+
+def upload_folder_concurrent(creds, local_folder_path, parent_id=None, file_mapping=None,
+                             max_workers=MAX_CONCURRENT_UPLOADS):
+    """Upload a folder tree to Google Drive with a pool of worker threads.
     
-    # Create the folder in Google Drive
-    folder_id = create_folder(service, folder_name, parent_id)
-    if not folder_id:
+    Folders are created breadth-first, one batch request per level once its
+    parents exist; then every file is uploaded concurrently into its folder.
+    """
+    stats = {'folders': 0, 'files': 0, 'errors': 0}
+    limiter = ConcurrencyLimiter(max_workers)
+    service = get_thread_service(creds)
+    
+    def upload_in_thread(local_path, drive_parent_id):
+        return upload_file(get_thread_service(creds), local_path, drive_parent_id, file_mapping, limiter)
+    
+    root_id = create_folder(service, os.path.basename(local_folder_path), parent_id, limiter)
+    if not root_id:
         return None
+    stats['folders'] += 1
     
-    # Track upload statistics
-    stats = {'folders': 1, 'files': 0, 'errors': 0}
+    folder_ids = {local_folder_path: root_id}
+    files_to_upload = []
+    level = [local_folder_path]
     
-    # Iterate through folder contents
-    try:
-        items = os.listdir(local_folder_path)
-    except PermissionError as e:
-        print(f"  ⚠️ Permission denied: {local_folder_path}")
-        stats['errors'] += 1
-        return stats
-    
-    for item in items:
-        item_path = os.path.join(local_folder_path, item)
+    # 1. Folders, level by level (one batch call per 100 folders)
+    while level:
+        subfolders = []
+        for local_dir in level:
+            try:
+                items = sorted(os.listdir(local_dir))
+            except PermissionError:
+                print(f"  ⚠️ Permission denied: {local_dir}")
+                stats['errors'] += 1
+                continue
+            
+            for item in items:
+                item_path = os.path.join(local_dir, item)
+                if os.path.isdir(item_path):
+                    subfolders.append((item_path, folder_ids[local_dir]))
+                else:
+                    files_to_upload.append((item_path, folder_ids[local_dir]))
         
-        if os.path.isdir(item_path):
-            # Recursively upload subfolder
-            sub_stats = upload_folder_recursive(service, item_path, folder_id, file_mapping)
-            if sub_stats:
-                stats['folders'] += sub_stats['folders']
-                stats['files'] += sub_stats['files']
-                stats['errors'] += sub_stats['errors']
-        else:
-            # Upload file
-            file_id = upload_file(service, item_path, folder_id, file_mapping)
-            if file_id:
+        created = create_folders(
+            service,
+            [(os.path.basename(path), drive_parent_id) for path, drive_parent_id in subfolders],
+            limiter
+        )
+        level = []
+        for item_path, drive_parent_id in subfolders:
+            folder_id = created.get((os.path.basename(item_path), drive_parent_id))
+            if folder_id:
+                folder_ids[item_path] = folder_id
+                stats['folders'] += 1
+                level.append(item_path)
+            else:
+                stats['errors'] += 1
+    
+    # 2. Files, all folders at once
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(upload_in_thread, path, folder_id) for path, folder_id in files_to_upload]
+        for future in as_completed(futures):
+            if future.result():
                 stats['files'] += 1
             else:
                 stats['errors'] += 1
@@ -152,26 +769,10 @@ def upload_folder_recursive(service, local_folder_path, parent_id=None, file_map
 
 def find_existing_folder(service, folder_name, parent_id=None):
     """Check if a folder with the given name already exists."""
-    query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-    if parent_id:
-        query += f" and '{parent_id}' in parents"
-    
-    try:
-        results = service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id, name)'
-        ).execute()
-        files = results.get('files', [])
-        if files:
-            return files[0].get('id')
-    except HttpError as error:
-        print(f"Error checking for existing folder: {error}")
-    
-    return None
+    return find_existing_folders(service, [folder_name], parent_id)[folder_name]
 
 
-def push_rag_data_to_drive():
+def push_rag_data_to_drive(max_workers=MAX_CONCURRENT_UPLOADS):
     """Main function to push RAG DATA folder to Google Drive."""
     print("=" * 60)
     print("🚀 RAG DATA to Google Drive Uploader")
@@ -186,7 +787,8 @@ def push_rag_data_to_drive():
     # Authenticate
     print("\n🔐 Authenticating with Google Drive...")
     try:
-        service = authenticate()
+        creds = load_credentials()
+        service = build('drive', 'v3', credentials=creds)
         print("✅ Authentication successful!")
     except Exception as e:
         print(f"❌ Authentication failed: {e}")
@@ -204,23 +806,28 @@ def push_rag_data_to_drive():
             return
     
     # Start upload
-    print(f"\n📤 Starting upload of '{RAG_DATA_FOLDER}'...")
+    print(f"\n📤 Starting upload of '{RAG_DATA_FOLDER}' ({max_workers} concurrent uploads)...")
     print("-" * 60)
     
-    # Initialize file mapping dictionary
+    # Initialize file mapping dictionary (replaces the existing mapping, except
+    # entries appended by the dashboard while the upload runs)
     file_mapping = {}
+    log_offset = mapping_log_offset()
     
-    stats = upload_folder_recursive(
-        service, 
-        RAG_DATA_FOLDER, 
+    stats = upload_folder_concurrent(
+        creds,
+        RAG_DATA_FOLDER,
         GOOGLE_DRIVE_PARENT_FOLDER_ID,
-        file_mapping
+        file_mapping,
+        max_workers
     )
+    if stats is None:
+        print(f"❌ Could not create the '{RAG_DATA_FOLDER}' folder on Google Drive")
+        return
     
     # Save the file mapping to JSON
     if file_mapping:
-        with open(DRIVE_MAPPING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(file_mapping, f, indent=2, ensure_ascii=False)
+        save_mapping(file_mapping, log_offset)
         print(f"\n💾 Saved file mapping to '{DRIVE_MAPPING_FILE}'")
     
     # Print summary
@@ -234,5 +841,175 @@ def push_rag_data_to_drive():
     print("=" * 60)
 
 
+def sync_rag_data_to_drive(max_workers=MAX_CONCURRENT_UPLOADS, prune=False):
+    """Incrementally sync RAG DATA to Google Drive using the file mapping.
+    
+    Files whose size and mtime match the mapping are skipped without being
+    read. Otherwise the local MD5 is compared with the recorded one (or with
+    Drive's md5Checksum for entries created before this metadata existed):
+    changed files are updated in place, new files are uploaded into their
+    folder, and the mapping is rewritten once at the end. Mapped files that
+    were deleted or trashed on Drive are uploaded again as new files.
+    """
+    print("=" * 60)
+    print("🔁 RAG DATA → Google Drive incremental sync")
+    print("=" * 60)
+    
+    if not os.path.exists(RAG_DATA_FOLDER):
+        print(f"❌ Error: Folder '{RAG_DATA_FOLDER}' not found!")
+        return
+    
+    try:
+        creds = load_credentials()
+        service = build('drive', 'v3', credentials=creds)
+    except Exception as e:
+        print(f"❌ Authentication failed: {e}")
+        return
+    
+    root_id = find_existing_folder(service, RAG_DATA_FOLDER, GOOGLE_DRIVE_PARENT_FOLDER_ID)
+    if not root_id:
+        root_id = create_folder(service, RAG_DATA_FOLDER, GOOGLE_DRIVE_PARENT_FOLDER_ID)
+        if not root_id:
+            return
+    
+    file_mapping, log_offset = load_mapping_snapshot()
+    keys_by_normalized = {normalize_mapping_key(key): key for key in file_mapping}
+    limiter = ConcurrencyLimiter(max_workers)
+    stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+    stats_lock = threading.Lock()
+    
+    # Drive folder IDs by relative local directory, resolved on demand
+    folder_ids = {'.': root_id}
+    folder_lock = threading.RLock()
+    
+    def resolve_folder(rel_dir):
+        with folder_lock:
+            if rel_dir not in folder_ids:
+                parent = resolve_folder(os.path.dirname(rel_dir) or '.')
+                name = os.path.basename(rel_dir)
+                thread_service = get_thread_service(creds)
+                folder_ids[rel_dir] = parent and (
+                    find_existing_folder(thread_service, name, parent)
+                    or create_folder(thread_service, name, parent, limiter)
+                )
+            return folder_ids[rel_dir]
+    
+    def count(outcome):
+        with stats_lock:
+            stats[outcome] += 1
+    
+    def entry_for(file_path):
+        rel_path = mapping_key(file_path)
+        key = keys_by_normalized.get(normalize_mapping_key(rel_path), rel_path)
+        return rel_path, key, file_mapping.get(key)
+    
+    def is_unchanged(entry, stat):
+        return entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime
+    
+    local_files = [
+        os.path.join(dirpath, name)
+        for dirpath, _, filenames in os.walk(RAG_DATA_FOLDER)
+        for name in sorted(filenames)
+    ]
+    print(f"\n🔍 Comparing {len(local_files)} local files with the mapping ({max_workers} workers)...")
+    
+    # Modified files: one batch lookup of their Drive state (checksum of legacy
+    # entries without a recorded MD5, and whether the file still exists)
+    changed_ids = []
+    for file_path in local_files:
+        _, _, entry = entry_for(file_path)
+        if entry and not is_unchanged(entry, os.stat(file_path)):
+            changed_ids.append(entry['file_id'])
+    remote_metadata = get_files_metadata(service, changed_ids, 'id, md5Checksum, trashed', limiter) if changed_ids else {}
+    
+    def sync_one(file_path):
+        thread_service = get_thread_service(creds)
+        rel_path, key, entry = entry_for(file_path)
+        
+        if entry and is_unchanged(entry, os.stat(file_path)):
+            return count('unchanged')
+        
+        if entry:
+            metadata = remote_metadata.get(entry['file_id'])
+            if not metadata or metadata.get('trashed'):
+                # Deleted or trashed on Drive: drop the stale entry and upload it again below
+                print(f"  ⚠️ Missing on Drive, re-uploading: {rel_path}")
+                entry = None
+        
+        if entry:
+            local_md5 = file_md5(file_path)
+            remote_md5 = entry.get('md5') or metadata.get('md5Checksum')
+            
+            if remote_md5 == local_md5:
+                record_mapping_entry(file_mapping, file_path, entry['file_id'], local_md5, key)
+                return count('unchanged')
+            try:
+                ok = update_file(thread_service, entry['file_id'], file_path, file_mapping, key, limiter)
+                return count('updated' if ok else 'errors')
+            except DriveFileMissing:
+                # Deleted between the metadata lookup and the update
+                print(f"  ⚠️ Missing on Drive, re-uploading: {rel_path}")
+        
+        parent_id = resolve_folder(os.path.dirname(rel_path) or '.')
+        if not parent_id:
+            return count('errors')
+        if key in file_mapping:
+            file_mapping.pop(key, None)
+        ok = upload_file(thread_service, file_path, parent_id, file_mapping, limiter)
+        return count('new' if ok else 'errors')
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(sync_one, path) for path in local_files]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"  ❌ Sync error: {e}")
+                count('errors')
+    
+    # Entries whose local file is gone
+    local_keys = {normalize_mapping_key(mapping_key(path)) for path in local_files}
+    missing = [key for key in file_mapping if normalize_mapping_key(key) not in local_keys]
+    if prune:
+        for key in missing:
+            file_mapping.pop(key)
+    
+    save_mapping(file_mapping, log_offset)
+    
+    print("-" * 60)
+    print("\n📊 Sync Summary:")
+    print(f"   🆕 New files:        {stats['new']}")
+    print(f"   🔄 Updated files:    {stats['updated']}")
+    print(f"   ✔️  Unchanged files:  {stats['unchanged']}")
+    print(f"   ❌ Errors:           {stats['errors']}")
+    if missing:
+        action = "removed from mapping" if prune else "kept in mapping (use --prune to drop)"
+        print(f"   🗑️  Missing locally:  {len(missing)} ({action})")
+    print(f"\n💾 Saved file mapping to '{DRIVE_MAPPING_FILE}'")
+    print("=" * 60)
+
+
 if __name__ == '__main__':
-    push_rag_data_to_drive()
+    parser = argparse.ArgumentParser(description="Push the RAG DATA folder to Google Drive.")
+    parser.add_argument(
+        '--workers', type=int, default=MAX_CONCURRENT_UPLOADS,
+        help=f"Maximum concurrent Drive requests (default: {MAX_CONCURRENT_UPLOADS})"
+    )
+    parser.add_argument(
+        '--chunk-mb', type=int, default=UPLOAD_CHUNK_SIZE // (1024 * 1024),
+        help="Resumable upload chunk size in MiB (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--sync', action='store_true',
+        help="Only upload new or changed files, using the mapping (no new root folder)"
+    )
+    parser.add_argument(
+        '--prune', action='store_true',
+        help="With --sync, drop mapping entries whose local file no longer exists"
+    )
+    args = parser.parse_args()
+    UPLOAD_CHUNK_SIZE = max(1, args.chunk_mb) * 1024 * 1024
+    if args.sync:
+        sync_rag_data_to_drive(max_workers=args.workers, prune=args.prune)
+    else:
+        push_rag_data_to_drive(max_workers=args.workers)
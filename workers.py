@@ -0,0 +1,39 @@
+"""
+Fonctions exécutées dans les processus du pool de calcul du tableau de bord.
+
+Elles vivent dans un module importable (et non dans le script Streamlit) pour
+pouvoir être sérialisées vers les processus enfants.
+"""
+
+import time
+import warnings
+
+import bcrypt
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+
+def extract_pdf_page_range(pdf_path, first_page=0, last_page=None):
+    """Extraire le texte des pages [first_page, last_page) d'un PDF (jusqu'à la fin si None).
+
+    Retourne une liste de tuples (numéro de page, texte, secondes d'extraction).
+    """
+    records = []
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*FontBBox.*")
+        with pdfplumber.open(pdf_path) as pdf:
+            if last_page is None:
+                last_page = len(pdf.pages)
+            for index in range(first_page, last_page):
+                started = time.perf_counter()
+                text = pdf.pages[index].extract_text() or ""
+                records.append((index + 1, text, time.perf_counter() - started))
+    return records
+
+
+def hash_password(password, rounds=12):
+    """Hasher un mot de passe avec bcrypt (coûteux : exécuté dans le pool de processus)."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')